@@ -0,0 +1,77 @@
+"""
+Event-to-timestamp latency of the keyboard adapters, measured through a pty.
+
+A writer thread types keys into the master side at random intervals and records
+perf_counter() just before each write; the adapter on the slave side stamps
+each key when it reads it. The difference is the latency the adapter adds.
+
+The msvcrt adapter cannot run off Windows, so it is modelled by its usage
+pattern: a non-blocking poll every 1 ms (RPSMode's polling loop), stamping
+the key when the poll sees it. The POSIX adapter is measured with blocking
+read(timeout).
+
+    python -m app.benchmarks.bench_input_latency
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import pty
+import random
+import threading
+import time
+
+import numpy as np
+
+from app.io_adapters.posix_keyboard_adapter import PosixKeyboardAdapter
+
+
+def _writer(master: int, n: int, sent: list, seed: int) -> None:
+    rng = random.Random(seed)
+    for _ in range(n):
+        time.sleep(rng.uniform(0.005, 0.02))
+        sent.append(time.perf_counter())
+        os.write(master, b"r")
+
+
+def measure(n: int, polling: bool, seed: int = 0) -> np.ndarray:
+    master, slave = pty.openpty()
+    sent: list = []
+    got: list = []
+    with PosixKeyboardAdapter(fd=slave) as adapter:
+        th = threading.Thread(target=_writer, args=(master, n, sent, seed))
+        th.start()
+        deadline = time.perf_counter() + n * 0.05 + 1.0
+        while len(got) < n and time.perf_counter() < deadline:
+            if polling:
+                token, t = adapter.read()
+                if token is None:
+                    time.sleep(0.001)
+                    continue
+            else:
+                token, t = adapter.read(timeout=0.1)
+                if token is None:
+                    continue
+            got.append(t)
+        th.join()
+    os.close(master)
+    os.close(slave)
+    m = min(len(sent), len(got))
+    return (np.asarray(got[:m]) - np.asarray(sent[:m])) * 1000.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", type=int, default=500, help="Keys per adapter")
+    args = parser.parse_args()
+
+    print(f"{'adapter':<28} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, polling in (("1 ms poll (msvcrt-style)", True), ("select, blocking (posix)", False)):
+        lat = measure(args.n, polling)
+        p50, p95, p99 = np.percentile(lat, [50, 95, 99])
+        print(f"{name:<28} {p50:8.3f} {p95:8.3f} {p99:8.3f} {lat.max():8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Per-frame cost of TrackerPage rendering with 1, 10 and 60 minutes of trial data.
+
+Run from the directory containing the 'app' package:
+
+    QT_QPA_PLATFORM=offscreen python -m app.benchmarks.bench_tracker_plot
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication
+
+from app.modes.tracker_mode import TrackerMode, TrackerConfig
+from app.ui.tracker_page import TrackerPage, TrackerWorker
+
+
+def _prefill(page: TrackerPage, minutes: float) -> None:
+    """
+    Start a trial on 'page' that already holds 'minutes' of samples at the page's rate.
+
+    The worker is never started; _step() below publishes samples in its place so
+    only the GUI side is timed.
+    """
+    hz = page._tick_hz
+    history_s = minutes * 60.0
+    cfg = TrackerConfig(duration_s=history_s + 3600.0, tick_hz=hz, target_kind="sine", max_lag_s=1.0)
+    page.mode = TrackerMode(cfg)
+    page._window_s = min(cfg.duration_s, page._max_window_s)
+    page._last_rendered = None
+
+    page.mode.start()
+    n = int(history_s * hz)
+    t = np.arange(n) / hz
+    x = page.mode.target_table.at_many(t)
+    page.mode._buf.extend(t, x, x)
+    # Continue the trial clock where the prefilled history ends
+    page.mode._t0 = time.perf_counter() - history_s
+    page._worker = TrackerWorker(page.mode, hz, lambda: 0.0)
+
+
+def _step(page: TrackerPage) -> None:
+    """
+    One simulation step published the way TrackerWorker.run does
+    """
+    now = time.perf_counter()
+    state = page.mode.step(t_now=now, user_val=0.0)
+    page._worker.latest = (state, now, now)
+
+
+def _legacy_update(page: TrackerPage, t_now_s: float) -> None:
+    """
+    The previous rendering path: full history to both curves
+    """
+    page._target_curve.setData(page.mode.times, page.mode.target_vals)
+    page._user_curve.setData(page.mode.times, page.mode.user_vals)
+
+
+def bench(page: TrackerPage, app: QApplication, minutes: float, frames: int, legacy: bool):
+    """
+    Mean seconds per frame for (TrackerPage._render alone, _render + paint)
+    """
+    _prefill(page, minutes)
+    original = page._update_curves
+    if legacy:
+        page._update_curves = lambda t_now_s: _legacy_update(page, t_now_s)
+    try:
+        # Warm-up (first setData allocates the curve's path buffers)
+        for _ in range(5):
+            _step(page)
+            page._render()
+            app.processEvents()
+        render_s = 0.0
+        frame_s = 0.0
+        for _ in range(frames):
+            _step(page)
+            t1 = time.perf_counter()
+            page._render()
+            t2 = time.perf_counter()
+            page.plot.viewport().update()
+            app.processEvents()
+            render_s += t2 - t1
+            frame_s += time.perf_counter() - t1
+        return render_s / frames, frame_s / frames
+    finally:
+        page._update_curves = original
+        page._worker = None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=100, help="Frames timed per trial length")
+    parser.add_argument("--minutes", type=float, nargs="+", default=[1.0, 10.0, 60.0])
+    parser.add_argument("--legacy", action="store_true", help="Also time the old full-history setData path")
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication([])
+    page = TrackerPage(on_back_clicked=lambda: None)
+    page.resize(900, 600)
+    page.show()
+
+    header = f"{'minutes':>8} {'samples':>9} {'render ms':>9} {'frame ms':>9}"
+    if args.legacy:
+        header += f" {'full render ms':>15} {'full frame ms':>14}"
+    print(header)
+    for minutes in args.minutes:
+        render, frame = bench(page, app, minutes, args.frames, legacy=False)
+        row = f"{minutes:8.0f} {int(minutes * 60 * page._tick_hz):9d} {render * 1e3:9.3f} {frame * 1e3:9.3f}"
+        if args.legacy:
+            render, frame = bench(page, app, minutes, args.frames, legacy=True)
+            row += f" {render * 1e3:15.3f} {frame * 1e3:14.3f}"
+        print(row)
+    page.close()
+
+
+if __name__ == "__main__":
+    main()
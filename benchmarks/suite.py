@@ -0,0 +1,260 @@
+"""
+Benchmark suite for the mode engines and the page tick paths.
+
+Results go to a JSON file (one entry per benchmark, plus machine info) so runs
+can be compared; --compare flags anything slower than the baseline by more
+than --threshold.
+
+    QT_QPA_PLATFORM=offscreen python -m app.benchmarks.suite --out bench.json
+    python -m app.benchmarks.suite --out new.json --compare bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import queue
+import sys
+import threading
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from app.modes.rps_mode import RPSMode
+from app.modes.tracker_mode import TrackerConfig, TrackerMode
+
+METRICS_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+
+
+def _timeit(fn: Callable[[], None], repeat: int) -> List[float]:
+    out = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        out.append(time.perf_counter() - t0)
+    return out
+
+
+def _summary(samples_s: List[float], per: int = 1, unit: str = "us") -> Dict:
+    scale = {"s": 1.0, "ms": 1e3, "us": 1e6}[unit]
+    a = np.asarray(samples_s) / per * scale
+    return {
+        "unit": unit,
+        "median": float(np.median(a)),
+        "p95": float(np.percentile(a, 95)),
+        "min": float(a.min()),
+        "n": int(len(a)),
+    }
+
+
+def _filled_mode(n: int, max_lag_s=None) -> TrackerMode:
+    cfg = TrackerConfig(duration_s=n / 50.0 + 1.0, target_kind="sine", max_lag_s=max_lag_s)
+    mode = TrackerMode(cfg)
+    mode.start()
+    t = np.arange(n) / 50.0
+    user = np.clip(mode.target_table.at_many(t - 0.2), -1.0, 1.0)
+    mode.step_many(mode._t0 + t, user)
+    return mode
+
+
+#--------------------------------------------
+# Engines
+#--------------------------------------------
+
+def bench_tracker_step(quick: bool) -> Dict:
+    n = 20_000 if quick else 100_000
+    mode = TrackerMode(TrackerConfig(duration_s=n / 50.0 + 1.0, max_lag_s=1.0))
+    ts = np.arange(n) / 50.0
+    us = np.sin(ts)
+
+    def run():
+        mode.start()
+        t0 = mode._t0
+        step = mode.step
+        for i in range(n):
+            step(t0 + ts[i], us[i])
+
+    res = _summary(_timeit(run, 3), per=n)
+    res["samples_per_s"] = 1e6 / res["median"]
+    return {"tracker_step": res}
+
+
+def bench_compute_metrics(quick: bool) -> Dict:
+    out = {}
+    for n in METRICS_SIZES[:3] if quick else METRICS_SIZES:
+        repeat = 5 if n <= 100_000 else 3
+        full = _filled_mode(n)
+        out[f"compute_metrics_fft_{n}"] = _summary(_timeit(full.compute_metrics, repeat), unit="ms")
+        bounded = _filled_mode(n, max_lag_s=1.0)
+        out[f"compute_metrics_online_{n}"] = _summary(_timeit(bounded.compute_metrics, repeat), unit="ms")
+    return out
+
+
+class _ScriptedSource:
+    """
+    Pushes a fixed key script from a thread; read(timeout) as KeyBuffer does
+    """
+
+    def __init__(self, script, gap_s: float):
+        self._q = queue.Queue()
+        self._script = script
+        self._gap_s = gap_s
+
+    def start(self):
+        def feed():
+            for tok in self._script:
+                time.sleep(self._gap_s)
+                self._q.put((tok, time.perf_counter()))
+        threading.Thread(target=feed, daemon=True).start()
+
+    def read(self, timeout=None):
+        try:
+            return self._q.get_nowait() if timeout is None else self._q.get(timeout=timeout)
+        except queue.Empty:
+            return None, None
+
+
+def bench_rps_latency(quick: bool) -> Dict:
+    trials = 10 if quick else 40
+    mode = RPSMode(window_ms=1000, k_samples=5)
+    out = {}
+    for blocking in (False, True):
+        lat = []
+        for _ in range(trials):
+            src = _ScriptedSource(["ROCK", "PAPER", "ROCK", "SCISSORS", "ROCK"], gap_s=0.005)
+            src.start()
+            res = mode.run_trial(src.read, blocking=blocking)
+            lat.append(res["latency_last_ms"] / 1e3)
+        out["rps_latency_" + ("blocking" if blocking else "polling")] = _summary(lat, unit="ms")
+    return out
+
+
+#--------------------------------------------
+# Qt tick paths
+#--------------------------------------------
+
+def bench_page_ticks(quick: bool) -> Dict:
+    try:
+        from PySide6.QtWidgets import QApplication
+        from app.ui.tracker_page import TrackerPage, TrackerWorker
+        from app.ui.test_mode_page import TestModePage
+    except ImportError as e:
+        return {"page_ticks_skipped": {"reason": str(e)}}
+
+    app = QApplication.instance() or QApplication([])
+    ticks = 200 if quick else 1000
+    out = {}
+
+    page = TrackerPage(on_back_clicked=lambda: None)
+    page.resize(900, 600)
+    page.show()
+    page.mode = TrackerMode(TrackerConfig(duration_s=3600.0, tick_hz=page._tick_hz, max_lag_s=1.0))
+    page._window_s = page._max_window_s
+    page.mode.start()
+    # Publish samples in place of a running TrackerWorker so only the render path is timed
+    page._worker = TrackerWorker(page.mode, page._tick_hz, lambda: 0.0)
+    samples = []
+    for _ in range(ticks):
+        now = time.perf_counter()
+        page._worker.latest = (page.mode.step(t_now=now, user_val=0.0), now, now)
+        t0 = time.perf_counter()
+        page._render()
+        samples.append(time.perf_counter() - t0)
+    page._worker = None
+    out["tracker_page_render"] = _summary(samples)
+    page.close()
+
+    test_page = TestModePage(on_back_clicked=lambda: None)
+    test_page._timer.stop()
+    test_page._cont_timer.stop()
+    test_page._cont_up_pressed = True
+    samples = []
+    for _ in range(ticks):
+        t0 = time.perf_counter()
+        test_page._cont_tick()
+        samples.append(time.perf_counter() - t0)
+    out["test_mode_cont_tick"] = _summary(samples)
+    test_page.close()
+    app.processEvents()
+    return out
+
+
+BENCHES = {
+    "tracker_step": bench_tracker_step,
+    "compute_metrics": bench_compute_metrics,
+    "rps_latency": bench_rps_latency,
+    "page_ticks": bench_page_ticks,
+}
+
+
+#--------------------------------------------
+# Reporting
+#--------------------------------------------
+
+def machine_info() -> Dict:
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """
+    Names of benchmarks whose median grew by more than 'threshold' (e.g. 0.2 = 20%)
+    """
+    regressions = []
+    for name, res in results.items():
+        old = baseline.get(name)
+        if not old or "median" not in res or "median" not in old or old.get("unit") != res.get("unit"):
+            continue
+        if old["median"] > 0 and res["median"] > old["median"] * (1.0 + threshold):
+            regressions.append(f"{name}: {old['median']:.3f} -> {res['median']:.3f} {res['unit']}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--out", default="bench_results.json", help="JSON results file")
+    p.add_argument("--only", nargs="+", choices=sorted(BENCHES), help="run a subset")
+    p.add_argument("--quick", action="store_true", help="smaller sizes / fewer repeats")
+    p.add_argument("--compare", default=None, help="baseline JSON to check for regressions")
+    p.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown vs baseline (fraction)")
+    args = p.parse_args(argv)
+
+    results: Dict = {}
+    for name in args.only or BENCHES:
+        t0 = time.perf_counter()
+        results.update(BENCHES[name](args.quick))
+        print(f"  {name}: {time.perf_counter() - t0:.1f} s", file=sys.stderr, flush=True)
+
+    for name, res in results.items():
+        if "median" in res:
+            print(f"{name:<36} {res['median']:>12.3f} {res['unit']:<3} (p95 {res['p95']:.3f})")
+        else:
+            print(f"{name:<36} {res}")
+
+    with open(args.out, "w") as fh:
+        json.dump({"machine": machine_info(), "quick": args.quick, "results": results}, fh, indent=2)
+    print(f"-> {args.out}")
+
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = json.load(fh).get("results", {})
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,26 +1,46 @@
+import sys
 import time
-import msvcrt #Standard windows io library 
 
-TOKENS = {
-    b"r" : "ROCK",
-    b"p" : "PAPER",
-    b"s" : "SCISSORS",
-}
+from app.io_adapters.protocol import TOKENS, BatchedReadMixin
 
-class KeyboardAdapter:
+if sys.platform == "win32":
+    import msvcrt #Standard windows io library 
+
+class WindowsKeyboardAdapter(BatchedReadMixin):
     '''
         Windows terminal key adapter using msvcrt.
         read() returns pressed token and timestamp if r,p,s is pressed.
         if no token is pressed return (none, none)
+        read(timeout) polls kbhit() until an r/p/s key arrives or the timeout passes.
      
     '''
-    
-    def read(self):
-        if msvcrt.kbhit():
-            ch = msvcrt.getch()
-            ch = ch.lower()
-            t = time.perf_counter()
-
-            return TOKENS.get(ch), t
-        return None, None 
-    
\ No newline at end of file
+
+    POLL_S = 0.001
+
+    def read(self, timeout=None):
+        if timeout is None:
+            if msvcrt.kbhit():
+                return self._getch()
+            return None, None
+
+        deadline = time.perf_counter() + timeout
+        while True:
+            while msvcrt.kbhit():
+                token, t = self._getch()
+                if token is not None:
+                    return token, t
+            if time.perf_counter() >= deadline:
+                return None, None
+            time.sleep(self.POLL_S)
+
+    def _getch(self):
+        ch = msvcrt.getch()
+        # Stamp when the key is read, not when polling started
+        t = time.perf_counter()
+        return TOKENS.get(ch.lower()), t
+
+# Platform-appropriate adapter with the same read() -> (token, timestamp) contract
+if sys.platform == "win32":
+    KeyboardAdapter = WindowsKeyboardAdapter
+else:
+    from app.io_adapters.posix_keyboard_adapter import PosixKeyboardAdapter as KeyboardAdapter
@@ -0,0 +1,80 @@
+import os
+import sys
+import time
+import select
+import termios
+import tty
+from collections import deque
+
+from app.io_adapters.protocol import TOKENS, BatchedReadMixin
+
+class PosixKeyboardAdapter(BatchedReadMixin):
+    '''
+        Linux/macOS terminal key adapter using termios + select.
+        The terminal is put in non-blocking cbreak mode (no line buffering, no echo)
+        until close(). Keys are timestamped with perf_counter() as soon as they are
+        read from the fd, so a late read() does not shift the timestamp.
+
+        read(timeout=None) returns (token, timestamp) for the next r/p/s key, or
+        (None, None). With a timeout it waits in select() for up to that many
+        seconds instead of returning at once, so callers never need to spin.
+    '''
+
+    def __init__(self, fd=None):
+        self._fd = sys.stdin.fileno() if fd is None else fd
+        self._pending = deque()
+        self._saved_attrs = None
+        self._saved_flags = None
+        self.open()
+
+    def open(self):
+        if self._saved_attrs is not None:
+            return
+        if os.isatty(self._fd):
+            self._saved_attrs = termios.tcgetattr(self._fd)
+            tty.setcbreak(self._fd)
+        else:
+            self._saved_attrs = []
+        self._saved_flags = os.get_blocking(self._fd)
+        os.set_blocking(self._fd, False)
+
+    def close(self):
+        if self._saved_attrs is None:
+            return
+        if self._saved_attrs:
+            termios.tcsetattr(self._fd, termios.TCSADRAIN, self._saved_attrs)
+        os.set_blocking(self._fd, self._saved_flags)
+        self._saved_attrs = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def read(self, timeout=None):
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while True:
+            while self._pending:
+                token, t = self._pending.popleft()
+                if token is not None:
+                    return token, t
+            wait = 0.0 if deadline is None else max(0.0, deadline - time.perf_counter())
+            if not self._fill(wait):
+                return None, None
+
+    def _fill(self, wait):
+        ''' Wait up to 'wait' seconds for input; queue every key read with one timestamp. '''
+        ready, _, _ = select.select([self._fd], [], [], wait)
+        if not ready:
+            return False
+        try:
+            data = os.read(self._fd, 64)
+        except BlockingIOError:
+            return True
+        t = time.perf_counter()
+        if not data:
+            return False
+        for b in data:
+            self._pending.append((TOKENS.get(bytes([b]).lower()), t))
+        return True
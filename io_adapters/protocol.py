@@ -0,0 +1,95 @@
+"""
+Input adapter protocol: per-sample read() and batched read_many().
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Protocol, Tuple, runtime_checkable
+import numpy as np
+
+# Class id <-> token; NO_CLASS marks samples that only carry a value (or nothing)
+CLASS_NAMES = ("REST", "ROCK", "PAPER", "SCISSORS")
+CLASS_IDS = {name: i for i, name in enumerate(CLASS_NAMES)}
+NO_CLASS = -1
+
+# Keyboard adapters: key byte (lowercased) -> token
+TOKENS = {
+    b"r" : "ROCK",
+    b"p" : "PAPER",
+    b"s" : "SCISSORS",
+}
+
+# One classifier output per record. prob / value are NaN when the source has none;
+# value carries a continuous output (e.g. the tracker's strength scalar).
+SAMPLE_DTYPE = np.dtype([
+    ("class_id", np.int16),
+    ("prob", np.float32),
+    ("value", np.float32),
+    ("t", np.float64),
+])
+
+
+def empty_block(n: int = 0) -> np.ndarray:
+    block = np.empty(n, dtype=SAMPLE_DTYPE)
+    block["class_id"] = NO_CLASS
+    block["prob"] = np.nan
+    block["value"] = np.nan
+    return block
+
+def make_block(class_id=NO_CLASS, t=None, prob=np.nan, value=np.nan) -> np.ndarray:
+    """
+    Build a sample block from per-field arrays (scalars broadcast)
+    """
+    n = len(np.atleast_1d(t))
+    block = np.empty(n, dtype=SAMPLE_DTYPE)
+    block["class_id"] = class_id
+    block["prob"] = prob
+    block["value"] = value
+    block["t"] = t
+    return block
+
+def tokens_to_block(samples) -> np.ndarray:
+    """
+    [(token, t), ...] -> sample block; unknown tokens become NO_CLASS
+    """
+    block = empty_block(len(samples))
+    if samples:
+        block["class_id"] = [CLASS_IDS.get(tok, NO_CLASS) for tok, _ in samples]
+        block["t"] = [t for _, t in samples]
+    return block
+
+
+@runtime_checkable
+class InputAdapter(Protocol):
+    """
+    What the modes expect from an input source.
+
+    read(timeout=None) -> (token, t) or (None, None); with a timeout it may wait
+    that long for a sample.
+    read_many(max_n, timeout=None) -> structured array of SAMPLE_DTYPE with at
+    most max_n samples (possibly empty); with a timeout it waits that long for
+    the first one, then returns whatever else is already available.
+    """
+
+    def read(self, timeout: Optional[float] = None) -> Tuple[Optional[str], Optional[float]]: ...
+
+    def read_many(self, max_n: int, timeout: Optional[float] = None) -> np.ndarray: ...
+
+
+class BatchedReadMixin:
+    """
+    read_many() for adapters that only implement read(); sources that produce
+    blocks natively should override it.
+    """
+
+    def read_many(self, max_n: int, timeout: Optional[float] = None) -> np.ndarray:
+        samples = []
+        token, t = self.read(timeout) if timeout is not None else self.read()
+        while t is not None:
+            if token is not None:
+                samples.append((token, t))
+            if len(samples) >= max_n:
+                break
+            token, t = self.read()
+        return tokens_to_block(samples)
+
@@ -1,12 +1,33 @@
+import time
+_T_LAUNCH = time.perf_counter()
+
+import os
 import sys
 from PySide6.QtWidgets import QApplication
+from app.processing.startup import StartupProfile
 from app.ui.main_window import MainWindow
+from app.ui.paint_probe import PaintProbe
 
 def main():
+    startup = StartupProfile(_T_LAUNCH)
+    startup.mark("imports")
     app = QApplication(sys.argv)
-    win = MainWindow()
+    startup.mark("qapplication")
+    win = MainWindow(startup)
+    startup.mark("window built")
+
+    # Usable = the landing page has actually been painted once. The report goes to
+    # <session>.startup.json on exit (<launch time>.startup.json if no page opened a
+    # session log); UDS_STARTUP_REPORT=1 also prints it here.
+    def _landing_painted(t):
+        startup.mark("first paint", t)
+        if os.environ.get("UDS_STARTUP_REPORT"):
+            print(startup.report_text(), file=sys.stderr, flush=True)
+    probe = PaintProbe(win.landing)
+    probe.arm(_landing_painted)
+
     win.show()
     sys.exit(app.exec())
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,149 @@
+"""
+Continuous sliding-window vote decoder for classifier gesture outputs.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Dict, Optional, Sequence
+
+from app.modes.rps_mode import RPS_CLASSES, REST
+
+# Rescale stored weights once the newest weight exceeds e^_RENORM_EXP
+_RENORM_EXP = 30.0
+
+
+class SlidingVoteDecoder:
+    """
+    Smoothed vote over the classifier outputs of the last window_ms.
+
+    Samples live in a fixed-capacity ring buffer. Each class keeps a running
+    score, so push() and poll() are O(1) amortized per sample, however high the
+    output rate. With tau_ms set, a sample's vote decays as exp(-age / tau);
+    this is stored as exp((t - t_ref) / tau) so old weights never need touching,
+    except for a rare O(capacity) rescale to stay in float range.
+
+    push() / poll() return a decision dict whenever the winning class changes,
+    otherwise None. An empty window (or a winner below min_confidence) decodes
+    as REST.
+    """
+
+    def __init__(
+        self,
+        window_ms: float = 500.0,
+        tau_ms: Optional[float] = None,
+        classes: Sequence[str] = RPS_CLASSES,
+        capacity: int = 4096,
+        min_confidence: float = 0.0,
+    ):
+        self.window_ms = float(window_ms)
+        self.tau_ms = tau_ms
+        self.classes = tuple(classes)
+        self.min_confidence = float(min_confidence)
+        self._window_s = self.window_ms / 1000.0
+        self._inv_tau = 1000.0 / float(tau_ms) if tau_ms else 0.0
+        self._index = {c: i for i, c in enumerate(self.classes)}
+
+        # Ring buffer of (class index, timestamp, weight)
+        self._cap = max(int(capacity), 1)
+        self._cls = [0] * self._cap
+        self._t = [0.0] * self._cap
+        self._w = [0.0] * self._cap
+        self._head = 0   # oldest sample
+        self._size = 0
+
+        self.reset()
+
+    def reset(self) -> None:
+        self._head = 0
+        self._size = 0
+        self._scores = [0.0] * len(self.classes)
+        self._counts = [0] * len(self.classes)
+        self._t_ref: Optional[float] = None
+        self.current = REST
+        self.confidence = 0.0
+
+    def __len__(self) -> int:
+        return self._size
+
+    #--------------------------------------------
+    # Streaming API
+    #--------------------------------------------
+    def push(self, token: Optional[str], t_event: float) -> Optional[Dict]:
+        """
+        Add one classifier output; tokens outside 'classes' (e.g. None) only advance time
+        """
+        ci = self._index.get(token) if token is not None else None
+        if ci is not None:
+            if self._size == self._cap:
+                self._evict_oldest()
+            w = self._weight(t_event)
+            slot = (self._head + self._size) % self._cap
+            self._cls[slot] = ci
+            self._t[slot] = t_event
+            self._w[slot] = w
+            self._size += 1
+            self._scores[ci] += w
+            self._counts[ci] += 1
+        return self.poll(t_event)
+
+    def poll(self, t_now: float) -> Optional[Dict]:
+        """
+        Drop samples older than window_ms and re-decide; call periodically when input is idle
+        """
+        cutoff = t_now - self._window_s
+        while self._size and self._t[self._head] < cutoff:
+            self._evict_oldest()
+        return self._decide(t_now)
+
+    #--------------------------------------------
+    # Internals
+    #--------------------------------------------
+    def _weight(self, t: float) -> float:
+        if not self._inv_tau:
+            return 1.0
+        if self._t_ref is None:
+            self._t_ref = t
+        x = (t - self._t_ref) * self._inv_tau
+        if x > _RENORM_EXP:
+            self._renormalize(t)
+            x = 0.0
+        return math.exp(x)
+
+    def _renormalize(self, t: float) -> None:
+        # Move the reference time to t; every stored weight shrinks by the same factor
+        f = math.exp(-(t - self._t_ref) * self._inv_tau)
+        self._t_ref = t
+        self._w = [w * f for w in self._w]
+        self._scores = [s * f for s in self._scores]
+
+    def _evict_oldest(self) -> None:
+        h = self._head
+        ci = self._cls[h]
+        self._counts[ci] -= 1
+        # Reset exactly when a class empties so rounding errors never accumulate
+        self._scores[ci] = self._scores[ci] - self._w[h] if self._counts[ci] else 0.0
+        self._head = (h + 1) % self._cap
+        self._size -= 1
+
+    def _decide(self, t_now: float) -> Optional[Dict]:
+        scores = self._scores
+        total = sum(scores)
+        if total > 0.0:
+            best = max(range(len(scores)), key=scores.__getitem__)
+            confidence = scores[best] / total
+            pred = self.classes[best] if confidence >= self.min_confidence else REST
+        else:
+            pred, confidence = REST, 0.0
+
+        self.confidence = confidence
+        if pred == self.current:
+            return None
+        self.current = pred
+        return {
+            "prediction": pred,
+            "confidence": confidence,
+            "n_samples": self._size,
+            "window_ms": self.window_ms,
+            "t_decision": t_now,
+        }
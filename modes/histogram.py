@@ -0,0 +1,128 @@
+"""
+Fixed-bin streaming histograms: bounded memory, O(1) add, mergeable.
+
+BinnedSketch works over any edges; LatencyHistogram is the log-binned
+millisecond case used for stage latencies (processing/latency.py) and tick
+lateness (modes/tick_scheduler.py). NumPy only, so modes can use it without
+depending on processing.
+
+    h = LatencyHistogram()
+    h.add(3.2)
+    h.percentile(99), h.sparkline()
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+from typing import Dict
+
+import numpy as np
+
+# Bin edges: 1 us .. 100 s, 20 bins per decade
+EDGES_MS = np.logspace(-3, 5, 8 * 20 + 1)
+
+_SPARK = "▁▂▃▄▅▆▇█"
+
+
+class BinnedSketch:
+    """
+    Streaming quantile sketch over fixed bin edges.
+
+    Memory is one count per bin however many values are added, add() is a
+    bisect, and quantiles read the counts, so both cost the same at any n.
+    Sketches with the same edges merge by adding counts. Quantiles come back
+    as the midpoint of their bin (geometric for log-spaced edges), clamped to
+    the exact min and max.
+    """
+
+    def __init__(self, edges, log: bool = False):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self._edges = self.edges.tolist()
+        self.log = log
+        self.counts = np.zeros(len(self.edges) + 1, dtype=np.int64)   # + under/overflow
+        self.n = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x: float) -> None:
+        self.counts[bisect.bisect_right(self._edges, x)] += 1
+        self.n += 1
+        self.total += x
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    def merge(self, other: "BinnedSketch") -> None:
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("can only merge sketches with the same bin edges")
+        self.counts += other.counts
+        self.n += other.n
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.n if self.n else 0.0
+
+    def percentile(self, q: float) -> float:
+        """
+        q-th percentile (0-100)
+        """
+        if self.n == 0:
+            return 0.0
+        rank = max(1, int(math.ceil(q / 100.0 * self.n)))
+        i = int(np.searchsorted(np.cumsum(self.counts), rank, side="left"))
+        if i == 0:
+            return self.min
+        if i >= len(self.edges):
+            return self.max
+        lo, hi = self.edges[i - 1], self.edges[i]
+        mid = math.sqrt(lo * hi) if self.log else 0.5 * (lo + hi)
+        return float(min(max(mid, self.min), self.max))
+
+    def quantiles(self, qs=(50, 90, 99)) -> Dict[float, float]:
+        return {q: self.percentile(q) for q in qs}
+
+    def sparkline(self, width: int = 16) -> str:
+        """
+        Counts between the lowest and highest occupied bins, regrouped into at most 'width' bars
+        """
+        occupied = np.flatnonzero(self.counts)
+        if not len(occupied):
+            return ""
+        counts = self.counts[occupied[0]:occupied[-1] + 1]
+        per_bar = -(-len(counts) // width)
+        bars = np.add.reduceat(counts, np.arange(0, len(counts), per_bar))
+        top = bars.max()
+        return "".join(_SPARK[int(round(c / top * (len(_SPARK) - 1)))] if c else " " for c in bars)
+
+
+class LatencyHistogram(BinnedSketch):
+    """
+    Log-binned latency histogram in milliseconds with exact count, mean and max
+    """
+
+    def __init__(self):
+        super().__init__(EDGES_MS, log=True)
+
+    @property
+    def total_ms(self) -> float:
+        return self.total
+
+    @property
+    def max_ms(self) -> float:
+        return self.max if self.n else 0.0
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "n": self.n,
+            "mean_ms": self.mean,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max_ms,
+        }
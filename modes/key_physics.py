@@ -0,0 +1,112 @@
+"""
+'Analog' keyboard physics: a held key accelerates a damped, clamped value in [-1, 1].
+
+KeyPhysics steps one value live (TrackerWorker); simulate_many() runs the
+same model for many parameter sets at once, for tuning against recorded key
+streams (processing/physics_sweep.py).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class KeyPhysicsParams:
+    """
+    Model constants
+    """
+
+    accel: float = 5.0          # units per second^2 when holding a key
+    damping: float = 3.0        # velocity damping
+    vmax: float = 3.0           # clamp velocity max
+    center_pull: float = 0.0    # > 0: drift back to 0 while no key is held (Test Mode's slider)
+
+
+class KeyPhysics:
+    """
+    One value driven by key force (+1 up, -1 down, 0 neither/both)
+    """
+
+    def __init__(self, params: KeyPhysicsParams | None = None):
+        self.params = params or KeyPhysicsParams()
+        self.reset()
+
+    def reset(self) -> None:
+        self.value = 0.0        # Current slider value in [-1, 1]
+        self.velocity = 0.0     # Internal velocity
+
+    def step(self, force: float, dt: float) -> float:
+        """
+        Advance dt seconds under 'force'; returns the new value
+        """
+        p = self.params
+
+        # Accelerate velocity, clamp to prevent runaway, then damp it
+        v = self.velocity + p.accel * force * dt
+        if v > p.vmax:
+            v = p.vmax
+        elif v < -p.vmax:
+            v = -p.vmax
+        v -= p.damping * v * dt
+
+        # Integrate into the value
+        u = self.value + v * dt
+        if p.center_pull > 0.0 and force == 0.0 and abs(u) > 1e-4:
+            u -= p.center_pull * (1.0 if u > 0.0 else -1.0) * dt
+
+        # Clamp to [-1, 1], stopping at the rails
+        if u > 1.0:
+            u, v = 1.0, 0.0
+        elif u < -1.0:
+            u, v = -1.0, 0.0
+
+        # Snap to rest near the centre once released
+        if p.center_pull > 0.0 and force == 0.0 and abs(u) < 1e-2:
+            u, v = 0.0, 0.0
+
+        self.value, self.velocity = u, v
+        return u
+
+
+def simulate_many(force: np.ndarray, dt: np.ndarray, accel, damping, vmax, center_pull=0.0) -> np.ndarray:
+    """
+    KeyPhysics.step over a recorded stream for P parameter sets at once.
+
+    force and dt are length-n streams; accel, damping, vmax and center_pull are
+    scalars or length-P arrays (broadcast). Returns the (P, n) values. The loop
+    runs over time only; every step is a handful of NumPy ops across all sets.
+    """
+    force = np.asarray(force, dtype=np.float64)
+    dt = np.asarray(dt, dtype=np.float64)
+    accel, damping, vmax, center_pull = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(a, dtype=np.float64)) for a in (accel, damping, vmax, center_pull))
+    )
+    P, n = accel.shape[0], force.shape[0]
+    out = np.empty((P, n))
+    u = np.zeros(P)
+    v = np.zeros(P)
+    pulls = bool(np.any(center_pull > 0.0))
+    sign = np.empty(P)
+    for i in range(n):
+        f = force[i]
+        h = dt[i]
+        v += accel * (f * h)
+        np.clip(v, -vmax, vmax, out=v)
+        v -= damping * v * h
+        u += v * h
+        if pulls and f == 0.0:
+            np.sign(u, out=sign)
+            u -= np.where((center_pull > 0.0) & (np.abs(u) > 1e-4), center_pull * sign * h, 0.0)
+        rail = np.abs(u) > 1.0
+        if rail.any():
+            np.clip(u, -1.0, 1.0, out=u)
+            v[rail] = 0.0
+        if pulls and f == 0.0:
+            rest = (center_pull > 0.0) & (np.abs(u) < 1e-2)
+            u[rest] = 0.0
+            v[rest] = 0.0
+        out[:, i] = u
+    return out
@@ -0,0 +1,287 @@
+"""
+Incremental tracking metrics for TrackerMode.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Dict, Optional
+import numpy as np
+
+from app.modes.xcorr import refine_peak
+
+
+def _prefix_sums(a: np.ndarray, K: int) -> np.ndarray:
+    return np.concatenate(([0.0], np.cumsum(a[:K])))
+
+
+class OnlineTrackingMetrics:
+    """
+    Running RMSE, Pearson r and bounded-lag cross-correlation of user vs target.
+
+    Every update() is O(1) in the trial length: Welford-style running moments
+    for the mean/variance/covariance, plus one vector op over the 2*max_lag+1
+    lag accumulators. result() reproduces what TrackerMode.compute_metrics
+    returns for lags in [-lag_limit, lag_limit], without touching the history.
+
+    max_lag is how many lags are accumulated. With max_lag_s the lags searched
+    are round(max_lag_s / dt) on the measured sample spacing, as the batch path
+    computes them, up to max_lag (lag_capped tells when that cap bites).
+    """
+
+    def __init__(self, max_lag: int, max_lag_s: Optional[float] = None):
+        self.max_lag = max(0, int(max_lag))
+        self.max_lag_s = max_lag_s
+        L = self.max_lag + 1
+        self._L = L
+
+        self.n = 0
+        self.t_first = 0.0
+        self.t_last = 0.0
+
+        # Welford moments
+        self.mean_x = 0.0
+        self.mean_y = 0.0
+        self._m2x = 0.0
+        self._m2y = 0.0
+        self._cxy = 0.0
+        self._sse = 0.0
+
+        # Raw sums used to correct lag sums for the non-overlapping edges
+        self._sx = 0.0
+        self._sy = 0.0
+        self._sxx = 0.0
+        self._syy = 0.0
+
+        # Doubled reverse ring: ring[p:p+L] is newest-first history, no copies
+        self._ring_x = np.zeros(2 * L)
+        self._ring_y = np.zeros(2 * L)
+        self._p = 0
+
+        # First L samples of the trial (edge corrections for the other side)
+        self._head_x = np.zeros(L)
+        self._head_y = np.zeros(L)
+
+        # _pos[k] = sum_i y[i+k] * x[i];  _neg[m] = sum_i x[i+m] * y[i]  (lag -m)
+        self._pos = np.zeros(L)
+        self._neg = np.zeros(L)
+
+    def update(self, t: float, x: float, y: float) -> None:
+        """
+        Add one (time, target, user) sample
+        """
+        n = self.n + 1
+        self.n = n
+        if n == 1:
+            self.t_first = t
+        self.t_last = t
+
+        dx = x - self.mean_x
+        self.mean_x += dx / n
+        dy = y - self.mean_y
+        self.mean_y += dy / n
+        self._m2x += dx * (x - self.mean_x)
+        self._m2y += dy * (y - self.mean_y)
+        self._cxy += dx * (y - self.mean_y)
+        e = y - x
+        self._sse += e * e
+
+        self._sx += x
+        self._sy += y
+        self._sxx += x * x
+        self._syy += y * y
+
+        L = self._L
+        if n <= L:
+            self._head_x[n - 1] = x
+            self._head_y[n - 1] = y
+
+        p = (self._p - 1) % L
+        self._p = p
+        rx, ry = self._ring_x, self._ring_y
+        rx[p] = rx[p + L] = x
+        ry[p] = ry[p + L] = y
+
+        hist_x = rx[p:p + L]
+        hist_y = ry[p:p + L]
+        self._pos += y * hist_x
+        self._neg += x * hist_y
+
+    def update_many(self, t: np.ndarray, x: np.ndarray, y: np.ndarray) -> None:
+        """
+        Add a block of samples; same result as calling update() per sample,
+        with the lag accumulators updated in one (m, max_lag) product
+        """
+        m = len(t)
+        if m == 0:
+            return
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        n0 = self.n
+        n = n0 + m
+        if n0 == 0:
+            self.t_first = float(t[0])
+        self.t_last = float(t[-1])
+        self.n = n
+
+        # Chan et al. merge of the block's moments into the running ones
+        mbx = float(x.mean())
+        mby = float(y.mean())
+        dxb = x - mbx
+        dyb = y - mby
+        dx = mbx - self.mean_x
+        dy = mby - self.mean_y
+        w = n0 * m / n
+        self.mean_x += dx * m / n
+        self.mean_y += dy * m / n
+        self._m2x += float(dxb @ dxb) + dx * dx * w
+        self._m2y += float(dyb @ dyb) + dy * dy * w
+        self._cxy += float(dxb @ dyb) + dx * dy * w
+        e = y - x
+        self._sse += float(e @ e)
+
+        self._sx += float(x.sum())
+        self._sy += float(y.sum())
+        self._sxx += float(x @ x)
+        self._syy += float(y @ y)
+
+        L = self._L
+        if n0 < L:
+            k = min(L - n0, m)
+            self._head_x[n0:n0 + k] = x[:k]
+            self._head_y[n0:n0 + k] = y[:k]
+
+        # Chronological history: the L-1 samples before the block, then the block
+        newest = slice(self._p, self._p + L)
+        xe = np.concatenate((self._ring_x[newest][:L - 1][::-1], x))
+        ye = np.concatenate((self._ring_y[newest][:L - 1][::-1], y))
+        # win[j, L-1-k] is the sample k steps before block sample j
+        win_x = np.lib.stride_tricks.sliding_window_view(xe, L)
+        win_y = np.lib.stride_tricks.sliding_window_view(ye, L)
+        self._pos += (y @ win_x)[::-1]
+        self._neg += (x @ win_y)[::-1]
+
+        last_x = xe[-L:][::-1]
+        last_y = ye[-L:][::-1]
+        self._p = 0
+        self._ring_x[:L] = self._ring_x[L:] = last_x
+        self._ring_y[:L] = self._ring_y[L:] = last_y
+
+    #--------------------------------------------
+    # Cheap scalar readouts
+    #--------------------------------------------
+    @property
+    def rmse(self) -> float:
+        return math.sqrt(self._sse / self.n) if self.n else 0.0
+
+    @property
+    def r(self) -> float:
+        n = self.n
+        if n < 2:
+            return 0.0
+        if math.sqrt(self._m2x / n) < 1e-12 or math.sqrt(self._m2y / n) < 1e-12:
+            return 0.0
+        return self._cxy / math.sqrt(self._m2x * self._m2y)
+
+    @property
+    def dt(self) -> float:
+        return (self.t_last - self.t_first) / (self.n - 1) if self.n >= 2 else 0.0
+
+    @property
+    def lag_limit(self) -> int:
+        if self.max_lag_s is None:
+            return self.max_lag
+        dt = self.dt
+        return int(round(self.max_lag_s / dt)) if dt > 0 else 0
+
+    @property
+    def lag_capped(self) -> bool:
+        return self.lag_limit > self.max_lag
+
+    #--------------------------------------------
+    # Lag search (O(max_lag))
+    #--------------------------------------------
+    def lag_curve(self):
+        """
+        (lags, centered cross-correlation) over the lags available so far
+        """
+        n = self.n
+        if n == 0:
+            return np.zeros(1, dtype=np.int64), np.zeros(1)
+        K = min(self.lag_limit, self.max_lag, n - 1)
+
+        mx, my = self.mean_x, self.mean_y
+        k = np.arange(K + 1)
+        newest = slice(self._p, self._p + self._L)
+        # Sums over the k newest / k oldest samples, k = 0..K
+        last_x = _prefix_sums(self._ring_x[newest], K)
+        last_y = _prefix_sums(self._ring_y[newest], K)
+        first_x = _prefix_sums(self._head_x, K)
+        first_y = _prefix_sums(self._head_y, K)
+
+        # Lag +k pairs x[0:n-k] with y[k:n]; lag -k pairs x[k:n] with y[0:n-k]
+        pos = self._pos[:K + 1] - mx * (self._sy - first_y) - my * (self._sx - last_x) + (n - k) * mx * my
+        neg = self._neg[:K + 1] - mx * (self._sy - last_y) - my * (self._sx - first_x) + (n - k) * mx * my
+
+        lags = np.arange(-K, K + 1)
+        corr = np.concatenate((neg[:0:-1], pos))
+        return lags, corr
+
+    def result(self) -> Dict[str, float]:
+        """
+        Same keys and meaning as TrackerMode.compute_metrics (lag bounded by max_lag)
+        """
+        n = self.n
+        if n < 3:
+            return {
+                "rmse": 0.0,
+                "r": 0.0,
+                "lag_ms": 0.0,
+                "lag_ms_refined": 0.0,
+                "rmse_best_lag": 0.0,
+                "n": float(n),
+                "duration_s": float(self.t_last if n else 0.0),
+            }
+
+        dt = self.dt
+        lags, corr = self.lag_curve()
+        i_best = int(np.argmax(corr))
+        k_best = int(lags[i_best])
+
+        return {
+            "rmse": self.rmse,
+            "r": self.r,
+            "lag_ms": float(k_best * dt * 1000.0),
+            "lag_ms_refined": float((k_best + refine_peak(corr, i_best)) * dt * 1000.0),
+            "rmse_best_lag": self._rmse_at_lag(k_best),
+            "n": float(n),
+            "duration_s": float(self.t_last),
+        }
+
+    def _rmse_at_lag(self, k: int) -> float:
+        n = self.n
+        m = abs(k)
+        if m >= n:
+            return 0.0
+        if m == 0:
+            return self.rmse
+
+        newest = slice(self._p, self._p + m)
+        last_xx = float(np.dot(self._ring_x[newest], self._ring_x[newest]))
+        last_yy = float(np.dot(self._ring_y[newest], self._ring_y[newest]))
+        first_xx = float(np.dot(self._head_x[:m], self._head_x[:m]))
+        first_yy = float(np.dot(self._head_y[:m], self._head_y[:m]))
+
+        if k > 0:
+            # x[0:n-k] vs y[k:n]
+            sxx = self._sxx - last_xx
+            syy = self._syy - first_yy
+            sxy = self._pos[m]
+        else:
+            # x[m:n] vs y[0:n-m]
+            sxx = self._sxx - first_xx
+            syy = self._syy - last_yy
+            sxy = self._neg[m]
+
+        sse = max(sxx + syy - 2.0 * sxy, 0.0)
+        return float(math.sqrt(sse / (n - m)))
@@ -1,6 +1,10 @@
 import time 
 from collections import Counter
 
+import numpy as np
+
+from app.io_adapters.protocol import CLASS_IDS, CLASS_NAMES
+
 RPS_CLASSES = ("ROCK", "PAPER", "SCISSORS")
 REST = "REST"
 
@@ -9,28 +13,45 @@ class RPSMode:
 
     '''
 
-    def __init__(self, countdown_ms=0, window_ms=2000, k_samples=5):
+    def __init__(self, countdown_ms=0, window_ms=2000, k_samples=5, clock=None):
         self.countdown_ms = countdown_ms
         self.window_ms = window_ms
         self.k_samples = k_samples 
+        # Time source in seconds; replay swaps in a virtual clock
+        self.clock = clock or time.perf_counter
 
-    def run_trial(self, read_fn):
+    def run_trial(self, read_fn, blocking=False, cancel_fn=None):
         '''
+        Collect up to k_samples r/p/s tokens within window_ms and vote.
 
+        read_fn() -> (token, t_event) is polled every 1 ms. With blocking=True,
+        read_fn(timeout) must instead wait up to 'timeout' seconds for a sample
+        and return (None, None) on timeout, so the loop wakes only when a
+        sample arrives or the window closes.
+
+        cancel_fn(), if given, is checked once per loop; when it returns True the
+        trial ends early and decides on what it has so far.
         '''
 
-        start_time = time.perf_counter()
+        start_time = self.clock()
         deadline = start_time + (self.window_ms / 1000.0)
         samples = []
 
        
 
         #Capture window loop
-        while time.perf_counter() < deadline and len(samples) < self.k_samples:
-            token, t_event = read_fn()
+        while len(samples) < self.k_samples:
+            remaining = deadline - self.clock()
+            if remaining <= 0 or (cancel_fn is not None and cancel_fn()):
+                break
+            if blocking:
+                token, t_event = read_fn(remaining)
+            else:
+                token, t_event = read_fn()
             if token in RPS_CLASSES:
                 samples.append((token, t_event))
-            time.sleep(0.001)
+            if not blocking:
+                time.sleep(0.001)
 
         # Decide
         if not samples:
@@ -42,6 +63,7 @@ class RPSMode:
                 "latency_last_ms"  : 0.0,
                 "n_samples" : 0,
                 "window_ms" : self.window_ms,
+                "t_decision" : self.clock(),
             }
         
         tokens = [t for (t, _) in samples]
@@ -52,7 +74,7 @@ class RPSMode:
 
         first_time = samples[0][1]
         last_time = samples[-1][1]
-        decision_time = time.perf_counter()
+        decision_time = self.clock()
 
         latency_first_ms = (decision_time - first_time) * 1000.0
         latency_last_ms = (decision_time - last_time) * 1000.0
@@ -64,8 +86,79 @@ class RPSMode:
             "latency_last_ms"  : latency_last_ms,
             "n_samples" : total,
             "window_ms" : self.window_ms,
+            "t_decision" : decision_time,
         }
     
+    def run_trial_blocks(self, read_many_fn, blocking=False, max_block=256, cancel_fn=None):
+        '''
+        run_trial() for batched sources: read_many_fn(max_n[, timeout]) returns a
+        SAMPLE_DTYPE block (see io_adapters.protocol). Each block is filtered and
+        counted with NumPy, so there is no Python work per sample.
+        '''
+
+        start_time = self.clock()
+        deadline = start_time + (self.window_ms / 1000.0)
+        rps_ids = np.array([CLASS_IDS[c] for c in RPS_CLASSES])
+        # Lookup table indexed by class_id + 1 (NO_CLASS is -1); cheaper than np.isin on small blocks
+        is_rps = np.zeros(len(CLASS_NAMES) + 1, dtype=bool)
+        is_rps[rps_ids + 1] = True
+        counts = np.zeros(len(CLASS_NAMES), dtype=np.int64)
+        # Position of each class's first sample in the window, for run_trial's tie-break
+        first_seen = np.full(len(CLASS_NAMES), np.iinfo(np.int64).max, dtype=np.int64)
+        total = 0
+        first_time = last_time = None
+
+        #Capture window loop
+        while total < self.k_samples:
+            remaining = deadline - self.clock()
+            if remaining <= 0 or (cancel_fn is not None and cancel_fn()):
+                break
+            want = min(self.k_samples - total, max_block)
+            if blocking:
+                block = read_many_fn(want, remaining)
+            else:
+                block = read_many_fn(want)
+            ids = block["class_id"]
+            keep = is_rps[ids + 1]
+            if keep.any():
+                ids = ids[keep][:self.k_samples - total]
+                ts = block["t"][keep]
+                counts += np.bincount(ids, minlength=len(CLASS_NAMES))
+                classes, idx = np.unique(ids, return_index=True)
+                np.minimum.at(first_seen, classes, total + idx)
+                if first_time is None:
+                    first_time = float(ts[0])
+                last_time = float(ts[len(ids) - 1])
+                total += len(ids)
+            elif not blocking:
+                time.sleep(0.001)
+
+        if total == 0:
+            return {
+                "prediction" : REST,
+                "confidence" : 0.25,
+                "latency_first_ms" : 0.0,
+                "latency_last_ms"  : 0.0,
+                "n_samples" : 0,
+                "window_ms" : self.window_ms,
+                "t_decision" : self.clock(),
+            }
+
+        # Ties go to the class seen first in the window, as Counter.most_common does in run_trial
+        tied = rps_ids[counts[rps_ids] == counts[rps_ids].max()]
+        best = int(tied[np.argmin(first_seen[tied])])
+        decision_time = self.clock()
+
+        return {
+            "prediction" : CLASS_NAMES[best],
+            "confidence" : float(counts[best]) / total,
+            "latency_first_ms" : (decision_time - first_time) * 1000.0,
+            "latency_last_ms"  : (decision_time - last_time) * 1000.0,
+            "n_samples" : total,
+            "window_ms" : self.window_ms,
+            "t_decision" : decision_time,
+        }
+
     def _countdown(self):
         seconds = max(self.countdown_ms // 1000, 0)
 
@@ -0,0 +1,89 @@
+"""
+Growable, preallocated float64 sample buffer.
+"""
+
+from __future__ import annotations
+
+from typing import Tuple
+import numpy as np
+
+
+class SampleBuffer:
+    """
+    Column-major float64 buffer for fixed-width samples (e.g. t, target, user).
+
+    Storage is one (n_channels, capacity) array, so each channel is contiguous
+    and 8 bytes per value. Capacity doubles when full. column() returns a
+    zero-copy view of the filled region; views handed out before a regrow keep
+    pointing at the old (still valid) storage.
+
+    One writer thread and any number of reader threads need no lock: a sample
+    is written before the count that publishes it, and columns() reads the
+    count once, so its views always have equal lengths and hold only finished
+    samples. (clear() is the exception and must not race readers.)
+    """
+
+    def __init__(self, n_channels: int, capacity: int = 1024):
+        self._n_channels = int(n_channels)
+        self._data = np.empty((self._n_channels, max(int(capacity), 1)), dtype=np.float64)
+        self._n = 0
+
+    def __len__(self) -> int:
+        return self._n
+
+    @property
+    def capacity(self) -> int:
+        return self._data.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        return self._data.nbytes
+
+    def reserve(self, capacity: int) -> None:
+        """
+        Make room for at least 'capacity' samples without further regrowth
+        """
+        if capacity > self.capacity:
+            self._resize(int(capacity))
+
+    def clear(self) -> None:
+        self._n = 0
+
+    def append(self, *values: float) -> None:
+        n = self._n
+        if n == self.capacity:
+            self._resize(2 * n)
+        d = self._data
+        for i, v in enumerate(values):
+            d[i, n] = v
+        # Publish the sample only after it is fully written
+        self._n = n + 1
+
+    def extend(self, *columns: np.ndarray) -> None:
+        """
+        Append a block of samples, one array per channel
+        """
+        m = len(columns[0])
+        n = self._n
+        if n + m > self.capacity:
+            self._resize(max(2 * self.capacity, n + m))
+        for i, col in enumerate(columns):
+            self._data[i, n:n + m] = col
+        self._n = n + m
+
+    def column(self, i: int) -> np.ndarray:
+        return self._data[i, :self._n]
+
+    def columns(self) -> Tuple[np.ndarray, ...]:
+        # Count first: any storage seen afterwards holds at least n finished samples
+        n = self._n
+        d = self._data
+        return tuple(d[i, :n] for i in range(self._n_channels))
+
+    def last(self, i: int) -> float:
+        return float(self._data[i, self._n - 1])
+
+    def _resize(self, capacity: int) -> None:
+        new = np.empty((self._n_channels, capacity), dtype=np.float64)
+        new[:, :self._n] = self._data[:, :self._n]
+        self._data = new
@@ -0,0 +1,132 @@
+"""
+Vectorized target trajectory generators for TrackerMode.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Callable, Dict
+import numpy as np
+
+if TYPE_CHECKING:
+    from app.modes.tracker_mode import TrackerConfig
+
+
+def target_sine(cfg: "TrackerConfig", t: np.ndarray) -> np.ndarray:
+    """
+    A * sin(2*pi*f*t + phi)
+    """
+    A = float(cfg.target_amplitude)
+    f = float(cfg.target_freq_hz)
+    phi = float(cfg.target_phase)
+    return A * np.sin(2.0 * np.pi * f * t + phi)
+
+def target_steps(cfg: "TrackerConfig", t: np.ndarray) -> np.ndarray:
+    """
+    Staircase cycling through fixed levels every 0.7 / f seconds
+    """
+    A = float(cfg.target_amplitude)
+    f = float(cfg.target_freq_hz)
+    segment_s = 0.7 / f
+    levels = np.array((0.0, 0.5 * A, A, 0.5 * A, 0.0, -0.5 * A, -A, -0.5 * A))
+    idx = np.floor_divide(t, segment_s).astype(np.int64) % len(levels)
+    return levels[idx]
+
+def target_chirp(cfg: "TrackerConfig", t: np.ndarray) -> np.ndarray:
+    """
+    Linear chirp sweeping target_freq_hz -> chirp_end_hz over the trial
+    """
+    A = float(cfg.target_amplitude)
+    f0 = float(cfg.target_freq_hz)
+    f1 = float(cfg.chirp_end_hz)
+    T = max(float(cfg.duration_s), 1e-6)
+    phase = 2.0 * np.pi * (f0 * t + 0.5 * (f1 - f0) / T * t * t)
+    return A * np.sin(phase + float(cfg.target_phase))
+
+def target_multisine(cfg: "TrackerConfig", t: np.ndarray) -> np.ndarray:
+    """
+    Sum of harmonics of target_freq_hz with seeded random phases, peak-normalized to A
+    """
+    A = float(cfg.target_amplitude)
+    f = float(cfg.target_freq_hz)
+    k = np.arange(1, max(int(cfg.multisine_components), 1) + 1)
+    rng = np.random.default_rng(cfg.target_seed)
+    phases = rng.uniform(0.0, 2.0 * np.pi, size=len(k))
+    # (n_components, n_samples) is small: a few harmonics x one trial
+    val = np.sin(2.0 * np.pi * f * k[:, None] * t[None, :] + phases[:, None]).sum(axis=0)
+    peak = float(np.max(np.abs(val))) if val.size else 0.0
+    return A * val / peak if peak > 1e-12 else val
+
+def target_file(cfg: "TrackerConfig", t: np.ndarray) -> np.ndarray:
+    """
+    Arbitrary 1-D waveform from a .npy file sampled at target_file_hz, repeated periodically and scaled by A
+    """
+    if not cfg.target_path:
+        raise ValueError("target_kind='file' needs TrackerConfig.target_path")
+    wave = np.asarray(np.load(cfg.target_path), dtype=np.float64).ravel()
+    if wave.size == 0:
+        raise ValueError(f"Empty target waveform: {cfg.target_path}")
+    fs = float(cfg.target_file_hz or cfg.tick_hz)
+    n = wave.size
+    # Periodic linear interpolation between file samples
+    pos = (t * fs) % n
+    i0 = np.floor(pos).astype(np.int64)
+    frac = pos - i0
+    i1 = (i0 + 1) % n
+    return float(cfg.target_amplitude) * (wave[i0] * (1.0 - frac) + wave[i1] * frac)
+
+
+TARGET_GENERATORS: Dict[str, Callable[["TrackerConfig", np.ndarray], np.ndarray]] = {
+    "sine": target_sine,
+    "steps": target_steps,
+    "chirp": target_chirp,
+    "multisine": target_multisine,
+    "file": target_file,
+}
+
+# Kinds whose table is looked up with zero-order hold instead of linear interpolation
+HOLD_KINDS = frozenset({"steps"})
+
+
+class TargetTable:
+    """
+    Target trajectory sampled once on a uniform grid at tick_hz.
+
+    at() looks a value up in O(1) (linear interpolation, or hold for step-like
+    kinds); the same table evaluated offline with at_many() gives exactly the
+    values a live trial saw.
+    """
+
+    def __init__(self, cfg: "TrackerConfig"):
+        self.kind = cfg.target_kind if cfg.target_kind in TARGET_GENERATORS else "sine"
+        self.hz = max(float(cfg.tick_hz), 1e-6)
+        # One extra tick past duration_s for the sample that crosses it
+        n = int(np.ceil(float(cfg.duration_s) * self.hz)) + 2
+        self.t = np.arange(n, dtype=np.float64) / self.hz
+        self.values = np.clip(TARGET_GENERATORS[self.kind](cfg, self.t), -1.0, 1.0)
+        self.hold = self.kind in HOLD_KINDS
+        self._last = len(self.values) - 1
+
+    def at(self, t: float) -> float:
+        pos = t * self.hz
+        if pos <= 0.0:
+            return float(self.values[0])
+        i = int(pos)
+        if i >= self._last:
+            return float(self.values[self._last])
+        if self.hold:
+            return float(self.values[i])
+        frac = pos - i
+        v = self.values
+        return float(v[i] + (v[i + 1] - v[i]) * frac)
+
+    def at_many(self, t: np.ndarray) -> np.ndarray:
+        """
+        Vectorized at(), for replaying a trial's target offline
+        """
+        pos = np.clip(np.asarray(t, dtype=np.float64) * self.hz, 0.0, float(self._last))
+        i = np.minimum(pos.astype(np.int64), self._last)
+        if self.hold:
+            return self.values[i]
+        j = np.minimum(i + 1, self._last)
+        frac = pos - i
+        return self.values[i] + (self.values[j] - self.values[i]) * frac
@@ -0,0 +1,117 @@
+"""
+Absolute-deadline tick scheduler for fixed-rate sampling.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from typing import Callable, Dict, List, Optional
+
+from app.modes.histogram import LatencyHistogram
+
+
+class DeadlineScheduler:
+    """
+    Ticks at t0 + k / hz for k = 1, 2, ... instead of "interval after the last tick".
+
+    Because deadlines are absolute, timer jitter never accumulates into drift.
+    due(now) returns every deadline that has passed since the previous call, so
+    a caller that woke late can catch up and keep a uniform sample grid; beyond
+    max_catchup the oldest are dropped and counted as missed. Lateness of each
+    tick (now - deadline) goes into a histogram; ticks later than
+    late_tolerance_s (default: half a period) count as late.
+
+    wait() is the blocking variant for a dedicated thread: it sleeps until the
+    deadline. With spin_s > 0 it sleeps to spin_s short of it and polls the
+    clock for the rest, yielding the GIL on every pass. That tightens the
+    median lateness at the cost of CPU, so spinning is opt-in. Catch-up
+    already keeps the sample grid uniform when a sleep overshoots.
+    """
+
+    def __init__(
+        self,
+        hz: float,
+        clock: Callable[[], float] = time.perf_counter,
+        late_tolerance_s: Optional[float] = None,
+        max_catchup: int = 5,
+        spin_s: float = 0.0,
+    ):
+        if hz <= 0:
+            raise ValueError(f"tick rate must be positive, got {hz}")
+        self.hz = float(hz)
+        self.period = 1.0 / self.hz
+        self.clock = clock
+        self.late_tolerance_s = self.period / 2.0 if late_tolerance_s is None else float(late_tolerance_s)
+        self.max_catchup = max(int(max_catchup), 1)
+        self.spin_s = float(spin_s)
+        self.start()
+
+    def start(self, t0: Optional[float] = None) -> None:
+        """
+        Restart the grid at t0 (default: now); the first deadline is t0 + period
+        """
+        self.t0 = self.clock() if t0 is None else float(t0)
+        self._k = 1
+        self.ticks = 0
+        self.late = 0
+        self.missed = 0
+        self.lateness = LatencyHistogram()
+
+    @property
+    def next_deadline(self) -> float:
+        return self.t0 + self._k * self.period
+
+    def seconds_until_next(self, now: Optional[float] = None) -> float:
+        now = self.clock() if now is None else now
+        return max(0.0, self.next_deadline - now)
+
+    def due(self, now: Optional[float] = None) -> List[float]:
+        """
+        Deadlines passed since the last call, oldest first (empty if none yet)
+        """
+        now = self.clock() if now is None else now
+        # Last deadline index that has passed
+        k_last = int(math.floor((now - self.t0) * self.hz + 1e-9))
+        if k_last < self._k:
+            return []
+        n = k_last - self._k + 1
+        if n > self.max_catchup:
+            self.missed += n - self.max_catchup
+            self._k = k_last - self.max_catchup + 1
+            n = self.max_catchup
+        deadlines = [self.t0 + (self._k + i) * self.period for i in range(n)]
+        self._k = k_last + 1
+
+        self.ticks += n
+        for d in deadlines:
+            late_s = now - d
+            self.lateness.add(late_s * 1000.0)
+            if late_s > self.late_tolerance_s:
+                self.late += 1
+        return deadlines
+
+    def wait(self) -> List[float]:
+        """
+        Block until the next deadline, then return due()
+        """
+        deadline = self.next_deadline
+        remaining = deadline - self.clock()
+        if remaining > self.spin_s:
+            time.sleep(remaining - self.spin_s)
+        while self.clock() < deadline:
+            # sleep(0) releases the GIL so the GUI thread keeps running
+            time.sleep(0)
+        return self.due()
+
+    def stats(self) -> Dict[str, float]:
+        s = self.lateness.summary()
+        return {
+            "hz": self.hz,
+            "ticks": self.ticks,
+            "late": self.late,
+            "missed": self.missed,
+            "lateness_p50_ms": s["p50_ms"],
+            "lateness_p99_ms": s["p99_ms"],
+            "lateness_max_ms": s["max_ms"],
+        }
@@ -6,10 +6,18 @@ from __future__ import annotations
 import math
 import time
 from dataclasses import dataclass
-from typing import Literal, Optional, Dict, List
+from typing import Callable, Literal, Optional, Dict, Tuple
 import numpy as np
 
-TargetKind = Literal["sine", "steps"]
+from app.modes.online_metrics import OnlineTrackingMetrics
+from app.modes.sample_buffer import SampleBuffer
+from app.modes.targets import TargetTable
+from app.modes.xcorr import xcorr_fft, refine_peak
+
+TargetKind = Literal["sine", "steps", "chirp", "multisine", "file"]
+
+# Live lag accumulators hold this many times the lags the nominal tick_hz implies
+LIVE_LAG_HEADROOM = 2.0
 
 def _clamp(x: float, lo: float = -1.0, hi: float = 1.0) -> float:
     """
@@ -28,26 +36,39 @@ class TrackerConfig:
     target_freq_hz: float = 0.15
     target_amplitude: float = 0.7
     target_phase: float = 0.0
+    chirp_end_hz: float = 0.6           # "chirp": final frequency at duration_s
+    multisine_components: int = 4       # "multisine": harmonics of target_freq_hz
+    target_seed: Optional[int] = 0      # "multisine": phase seed (same seed -> same target)
+    target_path: Optional[str] = None   # "file": 1-D .npy waveform
+    target_file_hz: Optional[float] = None  # "file": waveform sample rate (None = tick_hz)
     stabilize_user: bool = False 
     stabilize_alpha: float = 0.15
+    max_lag_s: Optional[float] = None   # Bound on |lag| searched by compute_metrics (None = all lags)
+    live_max_lag_s: float = 1.0         # Bound on |lag| tracked live when max_lag_s is None
 
 class TrackerMode:
     """
     
     """
 
-    def __init__(self, config: Optional[TrackerConfig] = None):
+    def __init__(self, config: Optional[TrackerConfig] = None, clock: Optional[Callable[[], float]] = None):
         self.cfg = config or TrackerConfig()
+        # Time source in seconds; replay swaps in a virtual clock
+        self.clock = clock or time.perf_counter
 
         # Timing
         self._t0: Optional[float] = None
         self._t_last: Optional[float] = None
         self._running: bool = False
 
-        # Buffers
-        self.times: List[float] = []
-        self.target_vals: List[float] = []
-        self.user_vals: List[float] = []
+        # Buffers: one float64 row each for t, target, user (24 bytes per sample)
+        self._buf = SampleBuffer(3, self._expected_samples())
+
+        # Running metrics, updated once per step()
+        self._online = self._new_online()
+
+        # Target trajectory, rebuilt at every start()
+        self._target = TargetTable(self.cfg)
 
         # Internal state for user stabilization
         self._user_smoothed: Optional[float] = None
@@ -60,7 +81,8 @@ class TrackerMode:
         """
         """
         self.reset_buffers()
-        self._t0 = time.perf_counter()
+        self._target = TargetTable(self.cfg)
+        self._t0 = self.clock()
         self._t_last = None
         self._running = True 
         self._user_smoothed = None
@@ -71,13 +93,57 @@ class TrackerMode:
 
     def reset_buffers(self) -> None:
         """"""
-        self.times.clear()
-        self.target_vals.clear()
-        self.user_vals.clear()
+        self._buf.clear()
+        self._buf.reserve(self._expected_samples())
+        self._online = self._new_online()
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
 
     def finished(self) -> bool:
         """"""
-        return bool(self.times) and (self.times[-1] >= self.cfg.duration_s)
+        return len(self._buf) > 0 and (self._buf.last(0) >= self.cfg.duration_s)
+
+    def _expected_samples(self) -> int:
+        # One tick of slack for the sample that crosses duration_s
+        return int(math.ceil(self.cfg.duration_s * self.cfg.tick_hz)) + 2
+
+    def _new_online(self) -> OnlineTrackingMetrics:
+        # The lag bound stays in seconds and becomes samples on the measured spacing,
+        # as in compute_metrics, so a real rate off tick_hz cannot make the two disagree
+        lag_s = self.cfg.max_lag_s if self.cfg.max_lag_s is not None else self.cfg.live_max_lag_s
+        lag_s = max(lag_s, 0.0)
+        return OnlineTrackingMetrics(int(math.ceil(lag_s * self.cfg.tick_hz * LIVE_LAG_HEADROOM)), lag_s)
+
+    #------------------------------------------------
+    # Buffer views (zero-copy, valid region only)
+    #------------------------------------------------
+    @property
+    def times(self) -> np.ndarray:
+        return self._buf.column(0)
+
+    @property
+    def target_vals(self) -> np.ndarray:
+        return self._buf.column(1)
+
+    @property
+    def user_vals(self) -> np.ndarray:
+        return self._buf.column(2)
+
+    def snapshot(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (times, target, user) views of the same published samples; safe to call while another thread steps
+        """
+        return self._buf.columns()
+
+    @property
+    def n_samples(self) -> int:
+        return len(self._buf)
+
+    @property
+    def target_table(self) -> TargetTable:
+        return self._target
     
     #------------------------------------------------
     # Main ticking API
@@ -101,15 +167,14 @@ class TrackerMode:
             else:
                 a = float(self.cfg.stabilize_alpha)
                 # Stabilizer: y[t] = (1 - a)*y[t-1] + a*u[t]
-                self._user_smoothed = (1.0 - a) * self.user_smoothed + a * user
+                self._user_smoothed = (1.0 - a) * self._user_smoothed + a * user
             user_out = _clamp(self._user_smoothed, -1.0, 1.0)
         else:
             user_out = user
 
         # Append to buffers 
-        self.times.append(t)
-        self.target_vals.append(target)
-        self.user_vals.append(user_out)
+        self._buf.append(t, target, user_out)
+        self._online.update(t, target, user_out)
 
         # Stop when trial duration is reached
         if t >= self.cfg.duration_s:
@@ -118,70 +183,90 @@ class TrackerMode:
         self._t_last = t_now
 
         return {"t": t, "target": target, "user": user_out}
-    
-    #------------------------------------------------------------
-    # Target generator
-    #------------------------------------------------------------
 
-    def _target_value(self, t: float) -> float:
+    def step_many(self, t_now: np.ndarray, user_vals: np.ndarray) -> int:
         """
+        Vectorized step() for a block of user samples (e.g. a classifier burst).
+        Samples past the one that crosses duration_s are dropped; returns how many were kept.
         """
-        kind = self.cfg.target_kind
-        if kind == "sine":
-            return self._target_sine(t)
-        elif kind == "steps":
-            return self._target_steps(t)
-        else:
-            return self._target_sine(t)
-        
-    def _target_sine(self, t: float) -> float:
+        if not self._running or self._t0 is None or len(t_now) == 0:
+            return 0
+
+        t = np.maximum(np.asarray(t_now, dtype=np.float64) - self._t0, 0.0)
+        # Keep up to and including the first sample at or past the end of the trial
+        end = int(np.searchsorted(t >= self.cfg.duration_s, True))
+        if end < len(t):
+            t = t[:end + 1]
+            self._running = False
+        m = len(t)
+
+        target = self._target.at_many(t)
+        user = np.clip(np.asarray(user_vals[:m], dtype=np.float64), -1.0, 1.0)
+
+        if self.cfg.stabilize_user:
+            # The EMA is sequential; m is a burst, not the whole trial
+            a = float(self.cfg.stabilize_alpha)
+            out = np.empty(m)
+            s = self._user_smoothed
+            for i in range(m):
+                s = user[i] if s is None else (1.0 - a) * s + a * user[i]
+                out[i] = s
+            self._user_smoothed = float(s)
+            user = np.clip(out, -1.0, 1.0)
+
+        self._buf.extend(t, target, user)
+        self._online.update_many(t, target, user)
+        self._t_last = float(t_now[m - 1])
+        return m
+
+    def step_block(self, block: np.ndarray) -> int:
         """
-        Generates a target sine wave with the cfg parameters
+        Consume a sample block from an input adapter (see io_adapters.protocol): uses its t and value fields
         """
-        A = float(self.cfg.target_amplitude)
-        f = float(self.cfg.target_freq_hz)
-        phi = float(self.cfg.target_phase)
-        val = A * math.sin(2.0 * math.pi * f * t + phi)
-
-        return _clamp(val, -1.0, 1.0)
+        valid = ~np.isnan(block["value"])
+        return self.step_many(block["t"][valid], block["value"][valid])
     
-    def _target_steps(self, t: float) -> float:
+    #------------------------------------------------------------
+    # Target generator
+    #------------------------------------------------------------
+
+    def _target_value(self, t: float) -> float:
         """
-        Step target cycles through fixed levels every 'segment_s' 
+        Target at elapsed time t, looked up in the table built at start()
         """
-        A = float(self.cfg.target_amplitude)
-        f = float(self.cfg.target_freq_hz)
-        
-        # 
-        segment_s = 0.7 / f
-
-        # define levels for the "staircase"
-        levels = (0.0, 0.5 * A, A, 0.5 * A, 0.0, -0.5 * A, -A, -0.5 * A)
-        idx = int(t // segment_s) % len(levels)
+        return self._target.at(t)
 
-        return _clamp(levels[idx], -1.0, 1.0)
-    
     #--------------------------------------------
     # Metrics
     #--------------------------------------------
+    def live_metrics(self) -> Dict[str, float]:
+        """
+        Metrics so far from the running accumulators, O(max lag) regardless of trial length
+        """
+        return self._online.result()
+
     def compute_metrics(self) -> Dict[str, float]:
         """
         
         """
 
-        if len(self.times) < 3:
+        n = len(self._buf)
+        # With a bounded lag the running accumulators already hold the answer
+        if self.cfg.max_lag_s is not None and self._online.n == n and not self._online.lag_capped:
+            return self._online.result()
+
+        if n < 3:
             return {
                 "rmse": 0.0,
                 "r": 0.0,
                 "lag_ms": 0.0,
+                "lag_ms_refined": 0.0,
                 "rmse_best_lag": 0.0,
-                "n": float(len(self.times)),
-                "duration_s": float(self.times[-1] if self.times else 0.0),
+                "n": float(n),
+                "duration_s": float(self._buf.last(0) if n else 0.0),
             }
 
-        t = np.asarray(self.times, dtype=np.float64)
-        y = np.asarray(self.user_vals, dtype=np.float64)
-        x = np.asarray(self.target_vals, dtype=np.float64)
+        t, x, y = self._buf.columns()
 
         # Basic RMSE
         rmse = float(np.sqrt(np.mean((y - x) ** 2)))
@@ -195,13 +280,17 @@ class TrackerMode:
         # Estimate an average sample period
         dt = float(np.mean(np.diff(t))) if len(t) >= 2 else (1.0 / max(self.cfg.tick_hz, 1e-6))
 
-        # Estimate lag
+        # Estimate lag (FFT cross-correlation of user vs target, optionally bounded)
         x0 = x - np.mean(x)
         y0 = y - np.mean(y)
-        corr = np.correlate(y0, x0, mode="full") # Correlate user vs target
-        lags = np.arange(-len(x) + 1, len(x), dtype=np.float64)
-        k_best = int(lags[np.argmax(corr)])
+        max_lag = None
+        if self.cfg.max_lag_s is not None:
+            max_lag = int(round(self.cfg.max_lag_s / dt)) if dt > 0 else 0
+        lags, corr = xcorr_fft(x0, y0, max_lag)
+        i_best = int(np.argmax(corr))
+        k_best = int(lags[i_best])
         lag_ms = float(k_best * dt * 1000.0)
+        lag_ms_refined = float((k_best + refine_peak(corr, i_best)) * dt * 1000.0)
 
         # Compute RMSE at best lag
         rmse_best = float(self._rmse_with_lag(x, y, k_best))
@@ -210,6 +299,7 @@ class TrackerMode:
             "rmse": rmse,
             "r": r,
             "lag_ms": lag_ms,
+            "lag_ms_refined": lag_ms_refined,
             "rmse_best_lag": rmse_best,
             "n": float(len(t)),
             "duration_s": float(t[-1]),
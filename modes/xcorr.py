@@ -0,0 +1,57 @@
+"""
+FFT cross-correlation helpers shared by the tracker metrics.
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+import numpy as np
+
+
+def _next_fast_len(n: int) -> int:
+    """
+    Smallest 2^a * 3^b * 5^c >= n, so the FFTs below stay fast for any length
+    """
+    best = 1 << max(n - 1, 0).bit_length()
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            m = p35
+            while m < n:
+                m *= 2
+            best = min(best, m)
+            p35 *= 3
+        p5 *= 5
+    return best
+
+def xcorr_fft(x0: np.ndarray, y0: np.ndarray, max_lag: Optional[int] = None):
+    """
+    Cross-correlation of y0 against x0 along the last axis via FFT, O(n log n).
+
+    Returns (lags, corr) where corr[..., i] = sum_j y0[..., j + lags[i]] * x0[..., j],
+    i.e. the same values as np.correlate(y0, x0, mode="full") for lags in
+    [-max_lag, max_lag] (all lags when max_lag is None).
+    """
+    n = x0.shape[-1]
+    K = n - 1 if max_lag is None else max(0, min(int(max_lag), n - 1))
+    nfft = _next_fast_len(n + K)
+    X = np.fft.rfft(x0, nfft)
+    Y = np.fft.rfft(y0, nfft)
+    circ = np.fft.irfft(Y * np.conj(X), nfft)
+    # Positive lags sit at the start of the circular result, negative ones wrap to the end
+    corr = np.concatenate((circ[..., nfft - K:], circ[..., :K + 1]), axis=-1)
+    lags = np.arange(-K, K + 1)
+    return lags, corr
+
+def refine_peak(corr: np.ndarray, i: int) -> float:
+    """
+    Sub-sample offset of the peak at index i from a parabola through its neighbours, in [-0.5, 0.5]
+    """
+    if i <= 0 or i >= len(corr) - 1:
+        return 0.0
+    a, b, c = corr[i - 1], corr[i], corr[i + 1]
+    denom = a - 2.0 * b + c
+    if denom >= 0.0:
+        return 0.0
+    return float(np.clip(0.5 * (a - c) / denom, -0.5, 0.5))
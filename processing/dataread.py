@@ -1,9 +1,437 @@
+"""
+Streaming converter for recorded ultrasound captures.
+
+Captures are stored as .npz archives (or bare .npy files) holding a 2-D
+``data_arr``. Instead of loading the whole array, the converter reads it in
+fixed-size row blocks straight out of the archive, rounds each block in place
+and streams it to the output, so memory use stays flat no matter how large
+the capture is.
+
+Pointing SRC at a directory converts every matching capture in it on a
+process pool, skipping outputs that are already up to date.
+
+Usage:
+    python dataread.py [SRC] [DST] [--format csv|npy|f32] [--block-rows N]
+    python dataread.py CAPTURE_DIR [OUT_DIR] [--pattern "Combo_*.npz"] [--jobs N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterator, List, Optional, Tuple
+
 import numpy as np
-import pandas as pd
 
-data = np.load("Combo_11_6.npz")
+DEFAULT_KEY = "data_arr"
+DEFAULT_BLOCK_ROWS = 65536
+DEFAULT_DECIMALS = 4
+DEFAULT_PATTERN = "Combo_*.npz"
+FORMATS = ("csv", "npy", "f32")
+
+
+@dataclass
+class ConvertStats:
+    """
+    Summary of a single conversion
+    """
+
+    src: Path
+    dst: Path
+    rows: int
+    seconds: float
+    skipped: bool = False
+    # "<ExceptionType>: <message>" when the conversion failed
+    error: Optional[str] = None
+
+    @property
+    def rows_per_s(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else float("inf")
+
+
+#--------------------------------------------
+# Reading
+#--------------------------------------------
+
+@contextmanager
+def open_array_stream(path, key: str = DEFAULT_KEY) -> Iterator[Tuple[BinaryIO, tuple, np.dtype]]:
+    """
+    Open the raw .npy stream of 'key' inside an .npz (or a bare .npy file).
+
+    Yields (file_obj, shape, dtype) with the file positioned at the first data byte.
+    Nothing is decompressed up front; compressed members are inflated as they are read.
+    """
+    path = Path(path)
+    if path.suffix == ".npz":
+        with zipfile.ZipFile(path) as zf:
+            with zf.open(key + ".npy") as fh:
+                shape, dtype = _read_npy_header(fh, path)
+                yield fh, shape, dtype
+    else:
+        with open(path, "rb") as fh:
+            shape, dtype = _read_npy_header(fh, path)
+            yield fh, shape, dtype
+
+
+def _read_npy_header(fh: BinaryIO, path: Path) -> Tuple[tuple, np.dtype]:
+    version = np.lib.format.read_magic(fh)
+    if version == (1, 0):
+        shape, fortran, dtype = np.lib.format.read_array_header_1_0(fh)
+    else:
+        shape, fortran, dtype = np.lib.format.read_array_header_2_0(fh)
+
+    if fortran and len(shape) > 1:
+        raise ValueError(f"{path}: Fortran-ordered arrays cannot be streamed by rows")
+    if dtype.hasobject:
+        raise ValueError(f"{path}: object arrays are not supported")
+    return shape, dtype
+
+
+def iter_row_blocks(path, key: str = DEFAULT_KEY, block_rows: int = DEFAULT_BLOCK_ROWS) -> Iterator[np.ndarray]:
+    """
+    Yield consecutive row blocks of the array 'key' stored in 'path'.
+
+    A single block buffer is reused for the whole file, so each yielded array is
+    only valid until the next iteration. Copy it if it needs to outlive the loop.
+    """
+    if block_rows <= 0:
+        raise ValueError("block_rows must be positive")
+
+    with open_array_stream(path, key) as (fh, shape, dtype):
+        n_rows = shape[0] if shape else 1
+        row_shape = tuple(shape[1:])
+        buf = np.empty((min(block_rows, max(n_rows, 1)),) + row_shape, dtype=dtype)
+
+        done = 0
+        while done < n_rows:
+            n = min(block_rows, n_rows - done)
+            block = buf[:n]
+            _read_exact(fh, memoryview(block.reshape(-1).view(np.uint8)), path)
+            yield block
+            done += n
+
+
+def _read_exact(fh: BinaryIO, mv: memoryview, path: Path) -> None:
+    pos = 0
+    total = len(mv)
+    while pos < total:
+        got = fh.readinto(mv[pos:])
+        if not got:
+            raise EOFError(f"{path}: truncated array data")
+        pos += got
+
+
+#--------------------------------------------
+# Writing
+#--------------------------------------------
+
+class _CsvSink:
+    def __init__(self, fh, dtype: np.dtype, decimals: int, index: bool):
+        self.fh = fh
+        self.index = index
+        self.row = 0
+        self.val_fmt = "%d" if dtype.kind in "iub" else f"%.{decimals}f"
+
+    def write(self, block: np.ndarray) -> None:
+        block = block.reshape(len(block), -1)
+        if self.index:
+            idx = np.arange(self.row, self.row + len(block))
+            fmt = ["%d"] + [self.val_fmt] * block.shape[1]
+            np.savetxt(self.fh, np.column_stack((idx, block)), fmt=fmt, delimiter=",")
+        else:
+            np.savetxt(self.fh, block, fmt=self.val_fmt, delimiter=",")
+        self.row += len(block)
+
+
+class _NpySink:
+    def __init__(self, fh, shape: tuple, dtype: np.dtype):
+        self.fh = fh
+        header = {
+            "descr": np.lib.format.dtype_to_descr(dtype),
+            "fortran_order": False,
+            "shape": shape,
+        }
+        np.lib.format.write_array_header_1_0(fh, header)
+
+    def write(self, block: np.ndarray) -> None:
+        block.tofile(self.fh)
+
+
+class _F32Sink:
+    def __init__(self, fh):
+        self.fh = fh
+
+    def write(self, block: np.ndarray) -> None:
+        block.astype("<f4", copy=False).tofile(self.fh)
+
+
+def _infer_format(dst: Path) -> str:
+    suffix = dst.suffix.lower().lstrip(".")
+    return suffix if suffix in FORMATS else "csv"
+
+
+def convert(
+    src,
+    dst,
+    fmt: Optional[str] = None,
+    key: str = DEFAULT_KEY,
+    block_rows: int = DEFAULT_BLOCK_ROWS,
+    decimals: int = DEFAULT_DECIMALS,
+    index: bool = True,
+    progress: Optional[Callable[[int, int, float], None]] = None,
+) -> ConvertStats:
+    """
+    Stream 'key' from 'src' into 'dst' in row blocks, rounding to 'decimals'.
+
+    fmt is one of 'csv', 'npy' or 'f32' (raw little-endian float32); when omitted
+    it is taken from the suffix of 'dst'. progress(rows_done, rows_total, elapsed_s)
+    is called after every block.
+    """
+    src, dst = Path(src), Path(dst)
+    fmt = fmt or _infer_format(dst)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown output format: {fmt!r}")
+
+    with open_array_stream(src, key) as (_, shape, dtype):
+        n_total = shape[0] if shape else 1
+
+    t0 = time.perf_counter()
+    rows = 0
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    # Write next to the target and rename at the end so an interrupted run
+    # never leaves a partial file that looks up to date
+    tmp = dst.with_name(dst.name + ".part")
+    try:
+        with open(tmp, "w" if fmt == "csv" else "wb") as fh:
+            if fmt == "csv":
+                sink = _CsvSink(fh, dtype, decimals, index)
+            elif fmt == "npy":
+                sink = _NpySink(fh, shape, dtype)
+            else:
+                sink = _F32Sink(fh)
+
+            for block in iter_row_blocks(src, key, block_rows):
+                if block.dtype.kind in "fc":
+                    np.round(block, decimals, out=block)
+                sink.write(block)
+                rows += len(block)
+                if progress is not None:
+                    progress(rows, n_total, time.perf_counter() - t0)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    os.replace(tmp, dst)
+
+    return ConvertStats(src=src, dst=dst, rows=rows, seconds=time.perf_counter() - t0)
+
+
+#--------------------------------------------
+# Batch conversion
+#--------------------------------------------
+
+def expected_size(src, fmt: str, key: str = DEFAULT_KEY) -> Optional[int]:
+    """
+    Byte size a converted output must have, or None when it is not fixed (CSV)
+    """
+    if fmt == "csv":
+        return None
+    with open_array_stream(src, key) as (_, shape, dtype):
+        n_items = int(np.prod(shape)) if shape else 1
+    if fmt == "f32":
+        return n_items * 4
+    header = {
+        "descr": np.lib.format.dtype_to_descr(dtype),
+        "fortran_order": False,
+        "shape": shape,
+    }
+    return len(_npy_header_bytes(header)) + n_items * dtype.itemsize
+
+
+def _npy_header_bytes(header: dict) -> bytes:
+    buf = io.BytesIO()
+    np.lib.format.write_array_header_1_0(buf, header)
+    return buf.getvalue()
+
+
+def is_up_to_date(src, dst, fmt: str, key: str = DEFAULT_KEY) -> bool:
+    """
+    True if 'dst' exists, is newer than 'src' and has the size the conversion would produce
+    """
+    src, dst = Path(src), Path(dst)
+    try:
+        d = dst.stat()
+    except FileNotFoundError:
+        return False
+    if d.st_mtime < src.stat().st_mtime or d.st_size == 0:
+        return False
+    size = expected_size(src, fmt, key)
+    return size is None or d.st_size == size
+
+
+def find_captures(directory, pattern: str = DEFAULT_PATTERN) -> List[Path]:
+    return sorted(p for p in Path(directory).glob(pattern) if p.is_file())
+
+
+def _convert_job(src: Path, dst: Path, fmt: str, key: str, block_rows: int,
+                 decimals: int, index: bool, force: bool) -> ConvertStats:
+    if not force and is_up_to_date(src, dst, fmt, key):
+        return ConvertStats(src=src, dst=dst, rows=0, seconds=0.0, skipped=True)
+    return convert(src, dst, fmt=fmt, key=key, block_rows=block_rows, decimals=decimals, index=index)
+
+
+def convert_directory(
+    directory,
+    out_dir=None,
+    fmt: str = "csv",
+    pattern: str = DEFAULT_PATTERN,
+    jobs: Optional[int] = None,
+    key: str = DEFAULT_KEY,
+    block_rows: int = DEFAULT_BLOCK_ROWS,
+    decimals: int = DEFAULT_DECIMALS,
+    index: bool = True,
+    force: bool = False,
+    on_done: Optional[Callable[[ConvertStats], None]] = None,
+) -> List[ConvertStats]:
+    """
+    Convert every capture matching 'pattern' in 'directory' on a process pool.
+
+    Outputs are named <stem>.<fmt> in 'out_dir' (default: next to the captures).
+    One worker per core unless 'jobs' says otherwise. Up-to-date outputs are
+    skipped unless 'force' is set. A file that fails to convert does not stop
+    the batch; its stats carry the error. Results come back in input order.
+    """
+    directory = Path(directory)
+    out_dir = Path(out_dir) if out_dir is not None else directory
+    sources = find_captures(directory, pattern)
+    if not sources:
+        return []
+
+    jobs = jobs or os.cpu_count() or 1
+    results = {}
+    with ProcessPoolExecutor(max_workers=min(jobs, len(sources))) as pool:
+        futures = {
+            pool.submit(_convert_job, src, out_dir / f"{src.stem}.{fmt}", fmt, key,
+                        block_rows, decimals, index, force): src
+            for src in sources
+        }
+        for fut in as_completed(futures):
+            src = futures[fut]
+            try:
+                stats = fut.result()
+            except Exception as e:
+                stats = ConvertStats(src=src, dst=out_dir / f"{src.stem}.{fmt}", rows=0, seconds=0.0,
+                                     error=f"{type(e).__name__}: {e}")
+            results[src] = stats
+            if on_done is not None:
+                on_done(stats)
+
+    return [results[src] for src in sources]
+
+
+def format_summary(results: List[ConvertStats], wall_s: float) -> str:
+    lines = [f"{'file':<32} {'rows':>10} {'time (s)':>10} {'rows/s':>12}"]
+    for r in results:
+        if r.error is not None:
+            lines.append(f"{r.src.name:<32} {'FAILED':>10}  {r.error}")
+        elif r.skipped:
+            lines.append(f"{r.src.name:<32} {'up to date':>10}")
+        else:
+            lines.append(f"{r.src.name:<32} {r.rows:>10} {r.seconds:>10.3f} {r.rows_per_s:>12,.0f}")
+    failed = [r for r in results if r.error is not None]
+    skipped = [r for r in results if r.skipped]
+    converted = [r for r in results if r.error is None and not r.skipped]
+    total_rows = sum(r.rows for r in converted)
+    lines.append(
+        f"{len(converted)} converted, {len(skipped)} skipped, {len(failed)} failed, "
+        f"{total_rows} rows in {wall_s:.3f} s wall"
+    )
+    return "\n".join(lines)
+
+
+#--------------------------------------------
+# Command line
+#--------------------------------------------
+
+def _print_progress(rows: int, total: int, elapsed: float) -> None:
+    rate = rows / elapsed if elapsed > 0 else 0.0
+    print(f"\r  {rows}/{total} rows  ({rate:,.0f} rows/s)", end="", file=sys.stderr, flush=True)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="Convert recorded captures to CSV, .npy or raw float32.")
+    p.add_argument("src", nargs="?", default="Combo_11_6.npz", help="input .npz/.npy file, or a directory of captures")
+    p.add_argument("dst", nargs="?", default=None, help="output file (output directory in batch mode)")
+    p.add_argument("--format", choices=FORMATS, default=None, help="output format (default: from DST suffix)")
+    p.add_argument("--key", default=DEFAULT_KEY, help="array name inside the .npz")
+    p.add_argument("--block-rows", type=int, default=DEFAULT_BLOCK_ROWS, help="rows per block")
+    p.add_argument("--decimals", type=int, default=DEFAULT_DECIMALS, help="rounding precision")
+    p.add_argument("--no-index", action="store_true", help="omit the leading row index column in CSV output")
+    p.add_argument("--quiet", action="store_true", help="no progress output")
+    p.add_argument("--pattern", default=DEFAULT_PATTERN, help="capture file pattern in batch mode")
+    p.add_argument("--jobs", type=int, default=None, help="worker processes in batch mode (default: one per core)")
+    p.add_argument("--force", action="store_true", help="reconvert even if outputs are up to date")
+    return p
+
+
+def _main_batch(args) -> int:
+    t0 = time.perf_counter()
+
+    def report(stats: ConvertStats) -> None:
+        if not args.quiet:
+            if stats.error is not None:
+                state = f"FAILED ({stats.error})"
+            else:
+                state = "up to date" if stats.skipped else f"{stats.seconds:.3f} s"
+            print(f"  {stats.src.name}: {state}", file=sys.stderr, flush=True)
+
+    results = convert_directory(
+        args.src,
+        out_dir=args.dst,
+        fmt=args.format or "csv",
+        pattern=args.pattern,
+        jobs=args.jobs,
+        key=args.key,
+        block_rows=args.block_rows,
+        decimals=args.decimals,
+        index=not args.no_index,
+        force=args.force,
+        on_done=report,
+    )
+    if not results:
+        print(f"No captures matching {args.pattern!r} in {args.src}", file=sys.stderr)
+        return 1
+    print(format_summary(results, time.perf_counter() - t0))
+    return 1 if any(r.error is not None for r in results) else 0
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if Path(args.src).is_dir():
+        return _main_batch(args)
+
+    stats = convert(
+        args.src,
+        args.dst or "rounded_data.csv",
+        fmt=args.format,
+        key=args.key,
+        block_rows=args.block_rows,
+        decimals=args.decimals,
+        index=not args.no_index,
+        progress=None if args.quiet else _print_progress,
+    )
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(f"{stats.src} -> {stats.dst}: {stats.rows} rows in {stats.seconds:.3f} s ({stats.rows_per_s:,.0f} rows/s)")
+    return 0
 
-data_arr = data["data_arr"]
-rounded = np.round(data_arr, 4)
 
-pd.DataFrame(rounded).to_csv("rounded_data.csv", index=True, header=False)
\ No newline at end of file
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,317 @@
+"""
+Memory-mapped dataset layer for recorded captures.
+
+A capture .npz is unpacked once into a directory of uncompressed .npy files
+plus a small index.json (shapes, dtypes, sample rate, trial boundaries).
+After that, Capture serves zero-copy np.memmap views by row range, trial or
+time range, so opening a capture and slicing it costs milliseconds no matter
+how large the recording is.
+
+    cat = DatasetCatalog("captures/", sample_rate_hz=1000.0)
+    cap = cat.open("Combo_11_6")
+    block = cap.time_slice(2.0, 4.0)
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import zipfile
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.processing.dataread import DEFAULT_BLOCK_ROWS, DEFAULT_KEY, iter_row_blocks, open_array_stream
+
+INDEX_NAME = "index.json"
+CAPTURE_SUFFIX = ".capture"
+TRIAL_KEY = "acq_num_arr"
+
+
+@dataclass
+class ArrayInfo:
+    file: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+
+@dataclass
+class CaptureIndex:
+    """
+    Contents of index.json for one unpacked capture
+    """
+
+    name: str
+    source: str
+    source_mtime: float
+    primary: str
+    sample_rate_hz: Optional[float]
+    arrays: Dict[str, ArrayInfo] = field(default_factory=dict)
+    trials: List[Tuple[int, int]] = field(default_factory=list)  # [start, stop) rows
+
+    def save(self, path: Path) -> None:
+        tmp = path.with_name(path.name + ".part")
+        tmp.write_text(json.dumps(asdict(self), indent=2))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "CaptureIndex":
+        raw = json.loads(Path(path).read_text())
+        arrays = {
+            k: ArrayInfo(file=v["file"], shape=tuple(v["shape"]), dtype=v["dtype"])
+            for k, v in raw.pop("arrays").items()
+        }
+        trials = [tuple(b) for b in raw.pop("trials")]
+        return cls(arrays=arrays, trials=trials, **raw)
+
+
+#--------------------------------------------
+# Unpacking
+#--------------------------------------------
+
+def capture_dir_for(src) -> Path:
+    src = Path(src)
+    return src.with_name(src.stem + CAPTURE_SUFFIX)
+
+
+def trial_bounds_from_acq(acq: np.ndarray) -> List[Tuple[int, int]]:
+    """
+    Split rows into trials wherever the acquisition counter does not advance by one.
+
+    Unsigned counters wrap (uint16: 65535 -> 0), which is still a step of one.
+    """
+    n = len(acq)
+    if n == 0:
+        return []
+    step = np.diff(acq.astype(np.int64))
+    if acq.dtype.kind == "u":
+        step %= 1 << (8 * acq.dtype.itemsize)
+    breaks = np.flatnonzero(step != 1) + 1
+    edges = [0, *breaks.tolist(), n]
+    return [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:])]
+
+
+def unpack_capture(
+    src,
+    out_dir=None,
+    sample_rate_hz: Optional[float] = None,
+    trial_bounds: Optional[Sequence[Tuple[int, int]]] = None,
+    primary: str = DEFAULT_KEY,
+    block_rows: int = DEFAULT_BLOCK_ROWS,
+) -> Path:
+    """
+    Unpack every array of 'src' (.npz) into uncompressed .npy files in 'out_dir'.
+
+    Arrays are streamed in row blocks, so memory use stays flat. Trial boundaries
+    default to breaks in the acquisition counter when the capture has one, else
+    the whole capture is one trial. The index is written last, so a directory
+    without index.json is an incomplete unpack. Returns the capture directory.
+    """
+    src = Path(src)
+    out_dir = Path(out_dir) if out_dir is not None else capture_dir_for(src)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    with zipfile.ZipFile(src) as zf:
+        keys = [n[:-4] for n in zf.namelist() if n.endswith(".npy")]
+    if primary not in keys:
+        raise KeyError(f"{src}: no array named {primary!r}")
+
+    index = CaptureIndex(
+        name=src.stem,
+        source=str(src.resolve()),
+        source_mtime=src.stat().st_mtime,
+        primary=primary,
+        sample_rate_hz=sample_rate_hz,
+    )
+
+    for key in keys:
+        with open_array_stream(src, key) as (_, shape, dtype):
+            pass
+        fname = key + ".npy"
+        out = np.lib.format.open_memmap(out_dir / fname, mode="w+", dtype=dtype, shape=shape)
+        if out.ndim == 0:
+            out[()] = next(iter_row_blocks(src, key, block_rows)).reshape(())
+        else:
+            row = 0
+            for block in iter_row_blocks(src, key, block_rows):
+                out[row:row + len(block)] = block
+                row += len(block)
+        out.flush()
+        del out
+        index.arrays[key] = ArrayInfo(file=fname, shape=tuple(shape), dtype=dtype.str)
+
+    n_rows = index.arrays[primary].shape[0]
+    if trial_bounds is not None:
+        index.trials = [(int(a), int(b)) for a, b in trial_bounds]
+    elif TRIAL_KEY in index.arrays:
+        index.trials = trial_bounds_from_acq(np.load(out_dir / index.arrays[TRIAL_KEY].file, mmap_mode="r"))
+    else:
+        index.trials = [(0, n_rows)]
+
+    index.save(out_dir / INDEX_NAME)
+    return out_dir
+
+
+def needs_unpack(src) -> bool:
+    """
+    True if 'src' has no complete unpacked copy, or the copy is older than the source
+    """
+    src = Path(src)
+    index_path = capture_dir_for(src) / INDEX_NAME
+    if not index_path.exists():
+        return True
+    return CaptureIndex.load(index_path).source_mtime < src.stat().st_mtime
+
+
+#--------------------------------------------
+# Access
+#--------------------------------------------
+
+class Capture:
+    """
+    Read-only, memory-mapped view of an unpacked capture.
+
+    Every accessor returns a view into the mapped file; nothing is read from
+    disk until the returned rows are actually touched.
+    """
+
+    def __init__(self, capture_dir):
+        self.path = Path(capture_dir)
+        self.index = CaptureIndex.load(self.path / INDEX_NAME)
+        self._maps: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def open(cls, path, sample_rate_hz: Optional[float] = None) -> "Capture":
+        """
+        Open an unpacked capture directory, or an .npz (unpacking it first if needed)
+        """
+        path = Path(path)
+        if path.suffix == ".npz":
+            if needs_unpack(path):
+                unpack_capture(path, sample_rate_hz=sample_rate_hz)
+            path = capture_dir_for(path)
+        cap = cls(path)
+        if sample_rate_hz is not None:
+            cap.index.sample_rate_hz = sample_rate_hz
+        return cap
+
+    @property
+    def name(self) -> str:
+        return self.index.name
+
+    @property
+    def sample_rate_hz(self) -> Optional[float]:
+        return self.index.sample_rate_hz
+
+    @property
+    def n_samples(self) -> int:
+        return self.index.arrays[self.index.primary].shape[0]
+
+    @property
+    def n_trials(self) -> int:
+        return len(self.index.trials)
+
+    @property
+    def duration_s(self) -> float:
+        return self.n_samples / self._require_rate()
+
+    def array(self, key: Optional[str] = None) -> np.ndarray:
+        key = key or self.index.primary
+        arr = self._maps.get(key)
+        if arr is None:
+            info = self.index.arrays[key]
+            arr = np.load(self.path / info.file, mmap_mode="r")
+            self._maps[key] = arr
+        return arr
+
+    @property
+    def data(self) -> np.ndarray:
+        return self.array()
+
+    def rows(self, start: int, stop: int, key: Optional[str] = None) -> np.ndarray:
+        return self.array(key)[start:stop]
+
+    def trial(self, i: int, key: Optional[str] = None) -> np.ndarray:
+        start, stop = self.index.trials[i]
+        return self.rows(start, stop, key)
+
+    def time_slice(self, t0_s: float, t1_s: float, key: Optional[str] = None) -> np.ndarray:
+        """
+        Rows with sample time in [t0_s, t1_s), times measured from the first row
+        """
+        fs = self._require_rate()
+        start = max(0, int(np.ceil(t0_s * fs)))
+        stop = min(self.n_samples, max(start, int(np.ceil(t1_s * fs))))
+        return self.rows(start, stop, key)
+
+    def _require_rate(self) -> float:
+        if not self.index.sample_rate_hz:
+            raise ValueError(f"{self.name}: sample rate unknown; pass sample_rate_hz when opening/unpacking")
+        return float(self.index.sample_rate_hz)
+
+
+class DatasetCatalog:
+    """
+    All captures under one directory, unpacked on first access
+    """
+
+    def __init__(self, root, sample_rate_hz: Optional[float] = None, pattern: str = "*.npz"):
+        self.root = Path(root)
+        self.sample_rate_hz = sample_rate_hz
+        self.pattern = pattern
+        self._open: Dict[str, Capture] = {}
+
+    def names(self) -> List[str]:
+        names = {p.stem for p in self.root.glob(self.pattern)}
+        names.update(p.name[: -len(CAPTURE_SUFFIX)] for p in self.root.glob("*" + CAPTURE_SUFFIX)
+                     if (p / INDEX_NAME).exists())
+        return sorted(names)
+
+    def unpack_all(self) -> List[Path]:
+        return [unpack_capture(p, sample_rate_hz=self.sample_rate_hz)
+                for p in sorted(self.root.glob(self.pattern)) if needs_unpack(p)]
+
+    def open(self, name: str) -> Capture:
+        cap = self._open.get(name)
+        if cap is None:
+            src = self.root / (name + ".npz")
+            path = src if src.exists() else self.root / (name + CAPTURE_SUFFIX)
+            cap = Capture.open(path, sample_rate_hz=self.sample_rate_hz)
+            self._open[name] = cap
+        return cap
+
+    def __iter__(self):
+        return (self.open(n) for n in self.names())
+
+    def __len__(self) -> int:
+        return len(self.names())
+
+
+#--------------------------------------------
+# Command line
+#--------------------------------------------
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Unpack captures into memory-mappable datasets.")
+    p.add_argument("paths", nargs="+", help=".npz captures or directories of captures")
+    p.add_argument("--sample-rate", type=float, default=None, help="sample rate in Hz to record in the index")
+    p.add_argument("--force", action="store_true", help="unpack even if an up-to-date copy exists")
+    args = p.parse_args(argv)
+
+    for path in map(Path, args.paths):
+        sources = sorted(path.glob("*.npz")) if path.is_dir() else [path]
+        for src in sources:
+            if args.force or needs_unpack(src):
+                out = unpack_capture(src, sample_rate_hz=args.sample_rate)
+                print(f"{src} -> {out}")
+            else:
+                print(f"{src}: up to date")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+Per-stage latency histograms for the input -> decision -> display pipeline.
+
+A trace is one event travelling through named stages (e.g. input, decision,
+delivered, painted). mark() stamps a stage; when a trace ends, the gap between
+each pair of consecutive stages and the end-to-end time go into fixed
+log-spaced histograms, so memory stays bounded however many traces run and
+p50/p95/p99 come from the bin counts (modes/histogram.py).
+
+    mon = LatencyMonitor()
+    mon.begin("rps", 7, "input", t_key)
+    mon.mark("rps", 7, "decision", t_dec)
+    mon.end("rps", 7, "painted")
+    print(mon.report_text())
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.modes.histogram import EDGES_MS, LatencyHistogram
+
+
+class LatencyMonitor:
+    """
+    Collects stage timestamps per (pipeline, trace id) and folds finished traces into histograms.
+
+    Safe to call from worker threads and the GUI thread.
+    """
+
+    def __init__(self, max_open: int = 256):
+        self._lock = threading.Lock()
+        self._open: Dict[Tuple[str, int], List[Tuple[str, float]]] = {}
+        self._max_open = max_open
+        self.hist: Dict[str, LatencyHistogram] = {}
+
+    def begin(self, pipeline: str, trace: int, stage: str, t: Optional[float] = None) -> None:
+        with self._lock:
+            if len(self._open) >= self._max_open:
+                # Drop the oldest unfinished trace rather than grow without bound
+                self._open.pop(next(iter(self._open)))
+            self._open[(pipeline, trace)] = [(stage, time.perf_counter() if t is None else t)]
+
+    def mark(self, pipeline: str, trace: int, stage: str, t: Optional[float] = None) -> None:
+        t = time.perf_counter() if t is None else t
+        with self._lock:
+            stages = self._open.get((pipeline, trace))
+            if stages is not None:
+                stages.append((stage, t))
+
+    def end(self, pipeline: str, trace: int, stage: str, t: Optional[float] = None) -> None:
+        t = time.perf_counter() if t is None else t
+        with self._lock:
+            stages = self._open.pop((pipeline, trace), None)
+            if stages is None:
+                return
+            stages.append((stage, t))
+            for (a, ta), (b, tb) in zip(stages, stages[1:]):
+                self._hist(f"{pipeline}: {a} -> {b}").add((tb - ta) * 1000.0)
+            self._hist(f"{pipeline}: {stages[0][0]} -> {stage} (total)").add((t - stages[0][1]) * 1000.0)
+
+    def is_open(self, pipeline: str, trace: int) -> bool:
+        with self._lock:
+            return (pipeline, trace) in self._open
+
+    def _hist(self, name: str) -> LatencyHistogram:
+        h = self.hist.get(name)
+        if h is None:
+            h = self.hist[name] = LatencyHistogram()
+        return h
+
+    #--------------------------------------------
+    # Reporting
+    #--------------------------------------------
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {name: h.summary() for name, h in sorted(self.hist.items())}
+
+    def report_text(self) -> str:
+        rows = self.summary()
+        if not rows:
+            return "Latency: no completed traces yet."
+        lines = [f"{'stage':<40} {'n':>6} {'p50':>8} {'p95':>8} {'p99':>8}  (ms)"]
+        for name, s in rows.items():
+            lines.append(f"{name:<40} {s['n']:>6} {s['p50_ms']:>8.2f} {s['p95_ms']:>8.2f} {s['p99_ms']:>8.2f}")
+        return "\n".join(lines)
+
+    def export_json(self, path) -> None:
+        with self._lock:
+            data = {
+                "bin_edges_ms": EDGES_MS.tolist(),
+                "stages": {
+                    name: {**h.summary(), "counts": h.counts.tolist()}
+                    for name, h in sorted(self.hist.items())
+                },
+            }
+        with open(path, "w") as fh:
+            json.dump(data, fh, indent=2)
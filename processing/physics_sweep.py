@@ -0,0 +1,229 @@
+"""
+Tune the tracker's keyboard physics against recorded sessions.
+
+Session logs (.udslog) hold every tracker sample with the key force that
+produced it. For each recorded trial the sweep re-runs the KeyPhysics model
+for every parameter set at once (modes.key_physics.simulate_many), scores the
+simulated user trace against the recorded target with TrackerMode's metrics
+(RMSE, Pearson r, lag, RMSE at best lag), and ranks the sets by their mean
+score over all trials. Key presses are replayed open-loop: the ranking says
+which model best turns what the user actually pressed into the target.
+
+Grid axes are "start:stop:num" (linspace) or comma lists:
+
+    python -m app.processing.physics_sweep recordings/ --accel 1:12:24 \\
+        --damping 0.5:8:24 --vmax 1:5:9 --out sweep.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import itertools
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from app.modes.key_physics import simulate_many
+from app.modes.xcorr import xcorr_fft
+from app.processing.recorder import KIND_TRACKER, SUFFIX, read_log
+
+PARAMS = ("accel", "damping", "vmax", "center_pull")
+METRICS = ("rmse", "r", "lag_ms", "rmse_best_lag")
+# Metrics where higher is better; the rest are ranked lowest first (lag by magnitude)
+HIGHER_IS_BETTER = {"r"}
+
+
+@dataclass
+class RecordedTrial:
+    """
+    Key force and target of one tracker trial, on the trial's sample grid
+    """
+
+    session: str
+    trial: int
+    t: np.ndarray
+    target: np.ndarray
+    force: np.ndarray
+
+    @property
+    def dt(self) -> np.ndarray:
+        # First sample is one step after the trial clock started at 0
+        return np.diff(self.t, prepend=0.0)
+
+
+#--------------------------------------------
+# Inputs
+#--------------------------------------------
+
+def load_trials(paths: Sequence) -> List[RecordedTrial]:
+    """
+    Tracker trials with recorded key force from .udslog files or directories of them
+    """
+    files: List[Path] = []
+    for p in map(Path, paths):
+        files += sorted(p.glob("*" + SUFFIX)) if p.is_dir() else [p]
+    trials = []
+    for f in files:
+        log = read_log(f)
+        samples = log[log["kind"] == KIND_TRACKER]
+        for trial in np.unique(samples["trial"]):
+            s = samples[samples["trial"] == trial]
+            s = s[np.argsort(s["t"], kind="stable")]
+            # Logs from before force was recorded can't be re-simulated
+            if len(s) < 3 or np.isnan(s["v2"]).any():
+                continue
+            trials.append(RecordedTrial(f.stem, int(trial), s["t"].copy(), s["v0"].copy(), s["v2"].copy()))
+    return trials
+
+
+def parse_axis(spec: str) -> np.ndarray:
+    """
+    "start:stop:num" -> linspace, "a,b,c" -> those values
+    """
+    if ":" in spec:
+        start, stop, num = spec.split(":")
+        return np.linspace(float(start), float(stop), int(num))
+    return np.array([float(v) for v in spec.split(",")])
+
+
+def build_grid(**axes: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Cartesian product of the axes as flat, equal-length arrays
+    """
+    names = list(axes)
+    mesh = np.meshgrid(*(np.asarray(axes[n], dtype=np.float64) for n in names), indexing="ij")
+    return {n: m.ravel() for n, m in zip(names, mesh)}
+
+
+#--------------------------------------------
+# Scoring
+#--------------------------------------------
+
+def score_many(user: np.ndarray, target: np.ndarray, dt: float, max_lag: int) -> Dict[str, np.ndarray]:
+    """
+    TrackerMode.compute_metrics for each row of 'user' (P, n) against one target, batched
+    """
+    err = user - target
+    rmse = np.sqrt(np.mean(err * err, axis=1))
+
+    x0 = target - target.mean()
+    y0 = user - user.mean(axis=1, keepdims=True)
+    sx = np.sqrt(np.sum(x0 * x0))
+    sy = np.sqrt(np.sum(y0 * y0, axis=1))
+    denom = sx * sy
+    valid = (np.std(target) >= 1e-12) & (np.std(user, axis=1) >= 1e-12)
+    r = np.where(valid, (y0 @ x0) / np.where(denom > 0, denom, 1.0), 0.0)
+
+    # Lag at the cross-correlation peak, one batched FFT for all rows
+    lags, corr = xcorr_fft(x0, y0, max_lag)
+    k_best = lags[np.argmax(corr, axis=1)]
+
+    # RMSE after the per-row shift, grouped by shift
+    n = target.shape[0]
+    rmse_best = np.empty(len(user))
+    for k in np.unique(k_best):
+        rows = k_best == k
+        if k >= 0:
+            seg = user[rows, k:] - target[:n - k]
+        else:
+            seg = user[rows, :n + k] - target[-k:]
+        rmse_best[rows] = np.sqrt(np.mean(seg * seg, axis=1)) if seg.shape[1] else 0.0
+
+    return {"rmse": rmse, "r": r, "lag_ms": k_best * dt * 1000.0, "rmse_best_lag": rmse_best}
+
+
+def sweep(trials: List[RecordedTrial], grid: Dict[str, np.ndarray], max_lag_s: float = 1.0,
+          chunk: int = 2048) -> Dict[str, np.ndarray]:
+    """
+    Mean of each metric over all trials, per parameter set in 'grid'
+    """
+    P = len(next(iter(grid.values())))
+    totals = {m: np.zeros(P) for m in METRICS}
+    for tr in trials:
+        dt = tr.dt
+        dt_mean = float(np.mean(np.diff(tr.t)))
+        max_lag = int(round(max_lag_s / dt_mean)) if dt_mean > 0 else 0
+        # Chunks bound memory at chunk * n floats per array
+        for lo in range(0, P, chunk):
+            hi = min(lo + chunk, P)
+            user = simulate_many(tr.force, dt, *(grid[p][lo:hi] if p in grid else 0.0 for p in PARAMS))
+            scores = score_many(user, tr.target, dt_mean, max_lag)
+            for m in METRICS:
+                totals[m][lo:hi] += scores[m]
+    return {m: v / max(len(trials), 1) for m, v in totals.items()}
+
+
+def rank(scores: Dict[str, np.ndarray], by: str) -> np.ndarray:
+    key = scores[by]
+    if by in HIGHER_IS_BETTER:
+        key = -key
+    elif by == "lag_ms":
+        key = np.abs(key)
+    return np.argsort(key, kind="stable")
+
+
+def write_csv(dst, grid: Dict[str, np.ndarray], scores: Dict[str, np.ndarray], order: np.ndarray) -> None:
+    names = [p for p in PARAMS if p in grid]
+    with open(dst, "w", newline="") as fh:
+        w = csv.writer(fh)
+        w.writerow(names + list(METRICS))
+        for i in order:
+            w.writerow([f"{grid[p][i]:.6g}" for p in names] + [f"{scores[m][i]:.6g}" for m in METRICS])
+
+
+#--------------------------------------------
+# Command line
+#--------------------------------------------
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("src", nargs="+", help=".udslog files or directories of them")
+    p.add_argument("--accel", default="1:12:24", help="accel axis (default %(default)s)")
+    p.add_argument("--damping", default="0.5:8:24", help="damping axis (default %(default)s)")
+    p.add_argument("--vmax", default="1:5:9", help="vmax axis (default %(default)s)")
+    p.add_argument("--center-pull", default="0", help="center_pull axis (default %(default)s)")
+    p.add_argument("--score", choices=METRICS, default="rmse", help="metric to rank by (default %(default)s)")
+    p.add_argument("--max-lag-s", type=float, default=1.0, help="lag search bound (default %(default)s)")
+    p.add_argument("--top", type=int, default=10, help="rows to print")
+    p.add_argument("--out", default=None, help="CSV with every parameter set, best first")
+    return p
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    trials = load_trials(args.src)
+    if not trials:
+        print("No tracker trials with recorded key force found", file=sys.stderr)
+        return 1
+    grid = build_grid(
+        accel=parse_axis(args.accel),
+        damping=parse_axis(args.damping),
+        vmax=parse_axis(args.vmax),
+        center_pull=parse_axis(args.center_pull),
+    )
+    P = len(grid["accel"])
+    samples = sum(len(tr.t) for tr in trials)
+
+    t0 = time.perf_counter()
+    scores = sweep(trials, grid, max_lag_s=args.max_lag_s)
+    elapsed = time.perf_counter() - t0
+    order = rank(scores, args.score)
+
+    print(f"{P} parameter sets x {len(trials)} trials ({samples} samples) in {elapsed:.2f} s", file=sys.stderr)
+    print(f"{'accel':>8} {'damping':>8} {'vmax':>6} {'pull':>6}  " + " ".join(f"{m:>13}" for m in METRICS))
+    for i in itertools.islice(order, args.top):
+        print(f"{grid['accel'][i]:8.3g} {grid['damping'][i]:8.3g} {grid['vmax'][i]:6.3g} {grid['center_pull'][i]:6.3g}  "
+              + " ".join(f"{scores[m][i]:13.4f}" for m in METRICS))
+    if args.out:
+        write_csv(args.out, grid, scores, order)
+        print(f"-> {args.out}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
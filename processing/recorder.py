@@ -0,0 +1,210 @@
+"""
+Append-only binary session log for inputs, RPS decisions and tracker samples.
+
+Every event is one fixed-size RECORD_DTYPE record (48 bytes) after a 16-byte
+header. Callers only enqueue a tuple; a background thread packs whatever has
+queued up into one array and appends it, so a 50 Hz GUI tick never waits on
+disk. read_log() maps the whole file back into NumPy in a single read.
+
+    rec = SessionRecorder.open_default()
+    rec.input(CLASS_IDS["ROCK"], t)
+    rec.tracker_sample(trial, t, target, user)
+    rec.close()
+
+    log = read_log("recordings/20261016-221500.udslog")
+    samples = log[log["kind"] == KIND_TRACKER]
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+from app.io_adapters.protocol import CLASS_IDS, NO_CLASS
+
+MAGIC = b"UDSLOG\x00\x00"
+VERSION = 1
+HEADER = struct.Struct("<8sII")   # magic, version, record size
+SUFFIX = ".udslog"
+DEFAULT_DIR = Path(__file__).resolve().parent.parent / "recordings"
+
+# Record kinds
+KIND_INPUT = 1        # class_id, t, v0 = prob, v1 = value
+KIND_DECISION = 2     # class_id = prediction, n = n_samples, trial, t, v0..v3 = confidence, latency first/last, window
+KIND_TRACKER = 3      # trial, t = trial time, v0 = target, v1 = user, v2 = key force (NaN if none)
+KIND_TRIAL_START = 4  # n = mode (MODE_*), trial, t
+
+MODE_RPS = 1
+MODE_TRACKER = 2
+
+RECORD_DTYPE = np.dtype([
+    ("kind", np.uint8),
+    ("class_id", np.int8),
+    ("n", np.int16),
+    ("trial", np.int32),
+    ("t", np.float64),
+    ("v0", np.float64),
+    ("v1", np.float64),
+    ("v2", np.float64),
+    ("v3", np.float64),
+])
+
+_nan = float("nan")
+
+
+class SessionRecorder:
+    """
+    Background-thread writer for one session log.
+
+    The record methods are safe to call from any thread and cost one queue put.
+    Records are written in arrival order; close() drains the queue and closes
+    the file. If a write fails (disk full, I/O error) the writer keeps draining
+    the queue but drops what it takes off: the exception stays in 'error', the
+    count in records_dropped, and close() reports both.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        size = self.path.stat().st_size if self.path.exists() else 0
+        if size < HEADER.size:
+            # Missing or torn header: start the file over
+            if size:
+                os.truncate(self.path, 0)
+            size = 0
+        elif size > HEADER.size:
+            # Drop a torn final record so new records stay aligned
+            torn = (size - HEADER.size) % RECORD_DTYPE.itemsize
+            if torn:
+                os.truncate(self.path, size - torn)
+        self._fh = open(self.path, "ab")
+        if size == 0:
+            self._fh.write(HEADER.pack(MAGIC, VERSION, RECORD_DTYPE.itemsize))
+            self._fh.flush()
+        self._q: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._closed = False
+        self.records_written = 0
+        self.records_dropped = 0
+        self.error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name="SessionRecorder", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def open_default(cls, directory=None) -> "SessionRecorder":
+        """
+        New log named by wall-clock start time in 'directory' (default: <app>/recordings)
+        """
+        directory = Path(directory or os.environ.get("UDS_RECORD_DIR", DEFAULT_DIR))
+        return cls(directory / (time.strftime("%Y%m%d-%H%M%S") + SUFFIX))
+
+    #--------------------------------------------
+    # Record API
+    #--------------------------------------------
+    def input(self, class_id: int, t: float, prob: float = _nan, value: float = _nan) -> None:
+        self._q.put((KIND_INPUT, class_id, 0, 0, t, prob, value, _nan, _nan))
+
+    def input_token(self, token: Optional[str], t: float) -> None:
+        self.input(CLASS_IDS.get(token, NO_CLASS), t)
+
+    def decision(self, trial: int, result: Dict, t: float) -> None:
+        self._q.put((
+            KIND_DECISION,
+            CLASS_IDS.get(result.get("prediction"), NO_CLASS),
+            int(result.get("n_samples", 0)),
+            trial,
+            t,
+            float(result.get("confidence", _nan)),
+            float(result.get("latency_first_ms", _nan)),
+            float(result.get("latency_last_ms", _nan)),
+            float(result.get("window_ms", _nan)),
+        ))
+
+    def tracker_sample(self, trial: int, t: float, target: float, user: float, force: float = _nan) -> None:
+        self._q.put((KIND_TRACKER, NO_CLASS, 0, trial, t, target, user, force, _nan))
+
+    def trial_start(self, mode: int, trial: int, t: float) -> None:
+        self._q.put((KIND_TRIAL_START, NO_CLASS, mode, trial, t, _nan, _nan, _nan, _nan))
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._q.put(None)
+        self._thread.join()
+        if self.error is not None:
+            print(
+                f"{self.path.name}: {self.records_dropped} records dropped after "
+                f"{type(self.error).__name__}: {self.error}",
+                file=sys.stderr, flush=True,
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    #--------------------------------------------
+    # Writer thread
+    #--------------------------------------------
+    def _run(self) -> None:
+        fh = self._fh
+        done = False
+        while not done:
+            item = self._q.get()
+            # Everything queued since the last write goes out in one append
+            batch = []
+            while True:
+                if item is None:
+                    done = True
+                    break
+                batch.append(item)
+                try:
+                    item = self._q.get_nowait()
+                except queue.Empty:
+                    break
+            if not batch:
+                continue
+            if self.error is not None:
+                self.records_dropped += len(batch)
+                continue
+            try:
+                fh.write(np.array(batch, dtype=RECORD_DTYPE).tobytes())
+                fh.flush()
+                self.records_written += len(batch)
+            except Exception as e:
+                # Keep draining so the queue cannot grow without bound
+                self.error = e
+                self.records_dropped += len(batch)
+                print(f"{self.path.name}: {type(e).__name__}: {e}", file=sys.stderr, flush=True)
+        try:
+            fh.close()
+        except Exception as e:
+            if self.error is None:
+                self.error = e
+
+
+def read_log(path) -> np.ndarray:
+    """
+    Whole log as one RECORD_DTYPE array; a torn final record (e.g. after a crash) is dropped
+    """
+    with open(path, "rb") as fh:
+        head = fh.read(HEADER.size)
+        if len(head) < HEADER.size:
+            raise ValueError(f"{path}: not a session log (short header)")
+        magic, version, size = HEADER.unpack(head)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a session log (bad magic)")
+        if version != VERSION or size != RECORD_DTYPE.itemsize:
+            raise ValueError(f"{path}: unsupported log version {version} / record size {size}")
+        raw = fh.read()
+    n = len(raw) // RECORD_DTYPE.itemsize
+    return np.frombuffer(raw, dtype=RECORD_DTYPE, count=n)
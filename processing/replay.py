@@ -0,0 +1,401 @@
+"""
+Headless replay of recorded sessions through RPSMode and TrackerMode.
+
+Sessions are the app's session logs (.udslog, processing/recorder.py) or
+.session.npz files. Both come down to the recorded input streams as
+io_adapters.protocol SAMPLE_DTYPE blocks plus the trial start times:
+
+    rps_inputs, rps_starts           classifier outputs and RPS trial starts
+    tracker_inputs, tracker_starts   user values and tracker trial starts
+    rps_params, tracker_config       JSON strings (optional)
+
+A log's parameters come from the <session>.config.json the app writes next to
+it on exit. Replayed RPS decisions are compared with the ones the log
+recorded (recorded_prediction column).
+
+Each trial is fed through the modes on a virtual clock: waiting for input
+advances the clock to the next recorded sample instead of sleeping, so a
+session re-scores as fast as the modes can compute. Sessions are spread over
+a process pool and the per-trial results land in one CSV table.
+
+Usage:
+    python replay.py SESSION_DIR [OUT_CSV] [--pattern "*.udslog"] [--jobs N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.io_adapters.protocol import CLASS_NAMES, NO_CLASS, SAMPLE_DTYPE, BatchedReadMixin, empty_block
+from app.modes.rps_mode import RPSMode
+from app.modes.tracker_mode import TrackerConfig, TrackerMode
+from app.processing.recorder import (
+    KIND_DECISION, KIND_INPUT, KIND_TRACKER, KIND_TRIAL_START, MODE_RPS, MODE_TRACKER, SUFFIX, read_log,
+)
+
+DEFAULT_PATTERN = "*" + SUFFIX
+NPZ_SUFFIX = ".session.npz"
+CONFIG_SUFFIX = ".config.json"
+RPS_KEYS = ("prediction", "confidence", "latency_first_ms", "latency_last_ms", "n_samples", "window_ms")
+TRACKER_KEYS = ("rmse", "r", "lag_ms", "lag_ms_refined", "rmse_best_lag", "n", "duration_s")
+COLUMNS = ("session", "mode", "trial", "t_start") + RPS_KEYS + ("recorded_prediction",) + TRACKER_KEYS
+
+
+@dataclass
+class ReplayStats:
+    """
+    Summary of a single session replay
+    """
+
+    src: Path
+    rows: List[Dict]
+    seconds: float
+    error: Optional[str] = None
+
+    @property
+    def trials(self) -> int:
+        return len(self.rows)
+
+
+#--------------------------------------------
+# Virtual time
+#--------------------------------------------
+
+class VirtualClock:
+    """
+    Callable time source whose time only moves when a replay source advances it
+    """
+
+    def __init__(self, t: float = 0.0):
+        self.t = float(t)
+
+    def __call__(self) -> float:
+        return self.t
+
+
+class ReplaySource(BatchedReadMixin):
+    """
+    Serves a recorded sample block against a VirtualClock.
+
+    read_many(max_n, timeout) returns the samples already due; if none are and
+    the next one is due within 'timeout', the clock jumps to it, otherwise the
+    clock jumps by 'timeout' and an empty block comes back.
+    """
+
+    def __init__(self, block: np.ndarray, clock: VirtualClock):
+        self._block = _by_time(block)
+        self._t = self._block["t"]
+        self._i = 0
+        self.clock = clock
+
+    def seek(self, t: float) -> None:
+        """
+        Move the clock to t and drop everything recorded before it (like KeyBuffer.clear())
+        """
+        self.clock.t = float(t)
+        self._i = max(self._i, int(np.searchsorted(self._t, t, side="left")))
+
+    def read_many(self, max_n: int, timeout: Optional[float] = None) -> np.ndarray:
+        clock = self.clock
+        wait = float(timeout or 0.0)
+        if self._i >= len(self._t) or self._t[self._i] > clock.t + wait:
+            clock.t += wait
+            return empty_block()
+        clock.t = max(clock.t, float(self._t[self._i]))
+        end = min(int(np.searchsorted(self._t, clock.t, side="right")), self._i + max_n)
+        out = self._block[self._i:end]
+        self._i = end
+        return out
+
+    def read(self, timeout: Optional[float] = None):
+        block = self.read_many(1, timeout)
+        if not len(block):
+            return None, None
+        cid = int(block["class_id"][0])
+        token = CLASS_NAMES[cid] if 0 <= cid < len(CLASS_NAMES) else None
+        return token, float(block["t"][0])
+
+
+#--------------------------------------------
+# Session files
+#--------------------------------------------
+
+def _by_time(block: np.ndarray) -> np.ndarray:
+    block = np.asarray(block, dtype=SAMPLE_DTYPE)
+    t = block["t"]
+    if len(t) < 2 or bool(np.all(t[1:] >= t[:-1])):
+        return block
+    return block[np.argsort(t, kind="stable")]
+
+
+def save_session(path, rps_inputs=None, rps_starts=None, tracker_inputs=None, tracker_starts=None,
+                 rps_params: Optional[Dict] = None, tracker_config: Optional[TrackerConfig] = None) -> Path:
+    path = Path(path)
+    arrays = {
+        "rps_inputs": np.asarray(rps_inputs if rps_inputs is not None else empty_block(), dtype=SAMPLE_DTYPE),
+        "rps_starts": np.asarray(rps_starts if rps_starts is not None else [], dtype=np.float64),
+        "tracker_inputs": np.asarray(tracker_inputs if tracker_inputs is not None else empty_block(), dtype=SAMPLE_DTYPE),
+        "tracker_starts": np.asarray(tracker_starts if tracker_starts is not None else [], dtype=np.float64),
+        "rps_params": np.array(json.dumps(rps_params or {})),
+        "tracker_config": np.array(json.dumps(asdict(tracker_config) if tracker_config else {})),
+    }
+    np.savez(path, **arrays)
+    return path
+
+
+def load_npz_session(path) -> Dict:
+    with np.load(path) as arc:
+        session = {k: arc[k] for k in ("rps_inputs", "rps_starts", "tracker_inputs", "tracker_starts") if k in arc.files}
+        for key in ("rps_params", "tracker_config"):
+            session[key] = json.loads(str(arc[key])) if key in arc.files else {}
+    return session
+
+
+def load_log_session(path) -> Dict:
+    """
+    Session streams rebuilt from a .udslog written by SessionRecorder.
+
+    RPS inputs and trial starts come over as recorded; tracker samples hold
+    trial time, so they are shifted onto their trial's start. Parameters come
+    from the <session>.config.json sidecar when there is one.
+    """
+    path = Path(path)
+    log = read_log(path)
+    config_path = path.with_suffix(CONFIG_SUFFIX)
+    config = json.loads(config_path.read_text()) if config_path.exists() else {}
+
+    inputs = log[log["kind"] == KIND_INPUT]
+    rps_inputs = empty_block(len(inputs))
+    rps_inputs["class_id"] = inputs["class_id"]
+    rps_inputs["prob"] = inputs["v0"]
+    rps_inputs["value"] = inputs["v1"]
+    rps_inputs["t"] = inputs["t"]
+
+    starts = log[log["kind"] == KIND_TRIAL_START]
+    rps_starts = starts[starts["n"] == MODE_RPS]
+    rps_starts = rps_starts[np.argsort(rps_starts["t"], kind="stable")]
+
+    decisions = log[log["kind"] == KIND_DECISION]
+    recorded = dict(zip(decisions["trial"].tolist(), decisions["class_id"].tolist()))
+    rps_params = dict(config.get("rps_params", {}))
+    if "window_ms" not in rps_params and len(decisions):
+        rps_params["window_ms"] = float(decisions["v3"][0])
+
+    tracker_starts = {int(r["trial"]): float(r["t"]) for r in starts[starts["n"] == MODE_TRACKER]}
+    samples = log[log["kind"] == KIND_TRACKER]
+    blocks, t_starts, trials, t_next = [], [], [], 0.0
+    for trial in np.unique(samples["trial"]):
+        s = samples[samples["trial"] == trial]
+        s = s[np.argsort(s["t"], kind="stable")]
+        # Trials without a start record are laid end to end after the previous one
+        t0 = max(tracker_starts.get(int(trial), t_next), t_next)
+        block = empty_block(len(s))
+        block["class_id"] = NO_CLASS
+        block["value"] = s["v1"]
+        block["t"] = t0 + s["t"]
+        blocks.append(block)
+        t_starts.append(t0)
+        trials.append(int(trial))
+        t_next = float(block["t"][-1]) + 1.0
+
+    return {
+        "rps_inputs": rps_inputs,
+        "rps_starts": rps_starts["t"],
+        "rps_trials": rps_starts["trial"],
+        "rps_recorded": [CLASS_NAMES[recorded[t]] if 0 <= recorded.get(t, NO_CLASS) < len(CLASS_NAMES)
+                         else None for t in rps_starts["trial"].tolist()],
+        "tracker_inputs": np.concatenate(blocks) if blocks else empty_block(),
+        "tracker_starts": np.array(t_starts, dtype=np.float64),
+        "tracker_trials": np.array(trials, dtype=np.int64),
+        "rps_params": rps_params,
+        "tracker_config": config.get("tracker_config", {}),
+    }
+
+
+def load_session(path) -> Dict:
+    return load_npz_session(path) if str(path).endswith(".npz") else load_log_session(path)
+
+
+def session_name(path: Path) -> str:
+    for suffix in (NPZ_SUFFIX, SUFFIX):
+        if path.name.endswith(suffix):
+            return path.name[:-len(suffix)]
+    return path.stem
+
+
+def _tracker_config(params: Dict, overrides: Optional[Dict]) -> TrackerConfig:
+    known = {f.name for f in fields(TrackerConfig)}
+    merged = {k: v for k, v in {**params, **(overrides or {})}.items() if k in known}
+    return TrackerConfig(**merged)
+
+
+#--------------------------------------------
+# Replay
+#--------------------------------------------
+
+def replay_rps(inputs: np.ndarray, starts: np.ndarray, params: Dict,
+               trials: Optional[np.ndarray] = None, recorded: Optional[List] = None) -> List[Dict]:
+    clock = VirtualClock()
+    mode = RPSMode(clock=clock, **{k: v for k, v in params.items() if k in ("countdown_ms", "window_ms", "k_samples")})
+    source = ReplaySource(inputs, clock)
+    rows = []
+    for i, t_start in enumerate(starts):
+        source.seek(t_start)
+        result = mode.run_trial_blocks(source.read_many, blocking=True)
+        row = {"mode": "rps", "trial": int(trials[i]) if trials is not None else i, "t_start": float(t_start), **result}
+        if recorded is not None:
+            row["recorded_prediction"] = recorded[i]
+        rows.append(row)
+    return rows
+
+
+def replay_tracker(inputs: np.ndarray, starts: np.ndarray, cfg: TrackerConfig,
+                   trials: Optional[np.ndarray] = None) -> List[Dict]:
+    clock = VirtualClock()
+    mode = TrackerMode(cfg, clock=clock)
+    inputs = _by_time(inputs)
+    t_all = inputs["t"]
+    bounds = np.searchsorted(t_all, np.append(starts, np.inf), side="left")
+    rows = []
+    for i, t_start in enumerate(starts):
+        clock.t = float(t_start)
+        mode.start()
+        mode.step_block(inputs[bounds[i]:bounds[i + 1]])
+        mode.stop()
+        trial = int(trials[i]) if trials is not None else i
+        rows.append({"mode": "tracker", "trial": trial, "t_start": float(t_start), **mode.compute_metrics()})
+    return rows
+
+
+def replay_session(src, rps_params: Optional[Dict] = None, tracker_overrides: Optional[Dict] = None) -> ReplayStats:
+    """
+    Replay every trial in one session; parameters override what the session recorded
+    """
+    src = Path(src)
+    t0 = time.perf_counter()
+    try:
+        session = load_session(src)
+        rows = []
+        if len(session.get("rps_starts", ())):
+            params = {**session["rps_params"], **(rps_params or {})}
+            rows += replay_rps(session["rps_inputs"], session["rps_starts"], params,
+                               session.get("rps_trials"), session.get("rps_recorded"))
+        if len(session.get("tracker_starts", ())):
+            cfg = _tracker_config(session["tracker_config"], tracker_overrides)
+            rows += replay_tracker(session["tracker_inputs"], session["tracker_starts"], cfg,
+                                   session.get("tracker_trials"))
+    except (OSError, ValueError, KeyError) as e:
+        return ReplayStats(src=src, rows=[], seconds=time.perf_counter() - t0, error=str(e))
+    name = session_name(src)
+    for row in rows:
+        row["session"] = name
+    return ReplayStats(src=src, rows=rows, seconds=time.perf_counter() - t0)
+
+
+def find_sessions(directory, pattern: str = DEFAULT_PATTERN) -> List[Path]:
+    return sorted(p for p in Path(directory).glob(pattern) if p.is_file())
+
+
+def replay_directory(
+    directory,
+    pattern: str = DEFAULT_PATTERN,
+    jobs: Optional[int] = None,
+    rps_params: Optional[Dict] = None,
+    tracker_overrides: Optional[Dict] = None,
+    on_done: Optional[Callable[[ReplayStats], None]] = None,
+) -> List[ReplayStats]:
+    """
+    Replay every session matching 'pattern' in 'directory' on a process pool.
+
+    One worker per core unless 'jobs' says otherwise. Results come back in input order.
+    """
+    sources = find_sessions(directory, pattern)
+    if not sources:
+        return []
+
+    jobs = jobs or os.cpu_count() or 1
+    results = {}
+    with ProcessPoolExecutor(max_workers=min(jobs, len(sources))) as pool:
+        futures = {pool.submit(replay_session, src, rps_params, tracker_overrides): src for src in sources}
+        for fut in as_completed(futures):
+            stats = fut.result()
+            results[futures[fut]] = stats
+            if on_done is not None:
+                on_done(stats)
+
+    return [results[src] for src in sources]
+
+
+def write_table(results: List[ReplayStats], dst) -> int:
+    """
+    One CSV row per trial across all sessions; returns the row count
+    """
+    n = 0
+    with open(dst, "w", newline="") as fh:
+        writer = csv.DictWriter(fh, fieldnames=COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        for stats in results:
+            writer.writerows(stats.rows)
+            n += len(stats.rows)
+    return n
+
+
+#--------------------------------------------
+# Command line
+#--------------------------------------------
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="Re-score recorded sessions through RPSMode and TrackerMode.")
+    p.add_argument("src", help="directory of session files")
+    p.add_argument("dst", nargs="?", default="replay_results.csv", help="output CSV table")
+    p.add_argument("--pattern", default=DEFAULT_PATTERN, help="session file pattern")
+    p.add_argument("--jobs", type=int, default=None, help="worker processes (default: one per core)")
+    p.add_argument("--window-ms", type=float, default=None, help="override RPSMode.window_ms")
+    p.add_argument("--k-samples", type=int, default=None, help="override RPSMode.k_samples")
+    p.add_argument("--max-lag-s", type=float, default=None, help="override TrackerConfig.max_lag_s")
+    p.add_argument("--quiet", action="store_true", help="no per-session output")
+    return p
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    rps_params = {k: v for k, v in (("window_ms", args.window_ms), ("k_samples", args.k_samples)) if v is not None}
+    tracker_overrides = {"max_lag_s": args.max_lag_s} if args.max_lag_s is not None else None
+
+    t0 = time.perf_counter()
+
+    def report(stats: ReplayStats) -> None:
+        if stats.error:
+            print(f"  {stats.src.name}: {stats.error}", file=sys.stderr, flush=True)
+        elif not args.quiet:
+            print(f"  {stats.src.name}: {stats.trials} trials in {stats.seconds:.3f} s", file=sys.stderr, flush=True)
+
+    results = replay_directory(args.src, pattern=args.pattern, jobs=args.jobs,
+                               rps_params=rps_params, tracker_overrides=tracker_overrides, on_done=report)
+    if not results:
+        print(f"No sessions matching {args.pattern!r} in {args.src}", file=sys.stderr)
+        return 1
+    rows = write_table(results, args.dst)
+    failed = sum(1 for r in results if r.error)
+    checked = [row for r in results for row in r.rows if row.get("recorded_prediction")]
+    if checked:
+        same = sum(row["prediction"] == row["recorded_prediction"] for row in checked)
+        print(f"RPS decisions matching the recording: {same}/{len(checked)}", file=sys.stderr)
+    print(f"{len(results) - failed} sessions, {rows} trials -> {args.dst} in {time.perf_counter() - t0:.3f} s wall"
+          + (f" ({failed} failed)" if failed else ""))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
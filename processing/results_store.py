@@ -0,0 +1,429 @@
+"""
+Indexed SQLite store of per-trial results, one row per RPS or tracker trial.
+
+Record calls only enqueue a row; a background thread commits whatever has
+queued up in one transaction, so the GUI never waits on disk. The same
+transaction adds the batch into a per-session totals table. A one-session
+summary is an aggregate over that session's range of the (mode, session)
+index; cross-session summaries aggregate the totals table, one row per
+session, so both stay fast with hundreds of thousands of trials. GUI code
+reads summaries through after_write(), which runs them on the writer thread
+once the rows before it are committed.
+
+    store = ResultsStore.open_default(session="20261016-221500")
+    store.record_rps(trial, result, opponent, outcome, config)
+    store.summary("rps", session=store.session)
+    store.summary_by("tracker", "session")
+    store.after_write(lambda: ready.emit(store.summary("rps", session=store.session)))
+
+    python -m app.processing.results_store recordings/results.sqlite --mode rps --by session
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from app.processing.recorder import DEFAULT_DIR
+
+DB_NAME = "results.sqlite"
+
+COLUMNS = (
+    "session", "subject", "mode", "trial", "t_wall", "config",
+    # RPS
+    "prediction", "opponent", "outcome", "confidence", "latency_first_ms", "latency_last_ms",
+    "n_samples", "window_ms",
+    # Tracker
+    "rmse", "r", "lag_ms", "rmse_best_lag", "duration_s",
+)
+
+# Averaged per mode in summaries
+METRICS = {
+    "rps": ("confidence", "n_samples", "latency_last_ms", "latency_first_ms"),
+    "tracker": ("rmse", "r", "lag_ms", "rmse_best_lag", "duration_s"),
+}
+OUTCOMES = {"WIN": "wins", "LOSE": "losses", "TIE": "ties"}
+_SUMMED = tuple(dict.fromkeys(m for ms in METRICS.values() for m in ms))
+# Bumped when the sessions table changes; older ones are rebuilt from trials on open
+SCHEMA_VERSION = 1
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS trials (
+    id INTEGER PRIMARY KEY,
+    session TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    trial INTEGER NOT NULL,
+    t_wall REAL NOT NULL,
+    config TEXT,
+    prediction TEXT,
+    opponent TEXT,
+    outcome TEXT,
+    confidence REAL,
+    latency_first_ms REAL,
+    latency_last_ms REAL,
+    n_samples INTEGER,
+    window_ms REAL,
+    rmse REAL,
+    r REAL,
+    lag_ms REAL,
+    rmse_best_lag REAL,
+    duration_s REAL
+);
+CREATE INDEX IF NOT EXISTS trials_mode_session ON trials (mode, session);
+CREATE INDEX IF NOT EXISTS trials_mode_subject ON trials (mode, subject, t_wall);
+
+-- Running totals per (mode, session), kept by the writer in the same transaction as the
+-- rows: cross-session summaries read one row per session instead of every trial.
+-- n_<metric> counts the non-NULL values in sum_<metric>, so averages skip NULL/NaN like AVG()
+CREATE TABLE IF NOT EXISTS sessions (
+    mode TEXT NOT NULL,
+    session TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    trials INTEGER NOT NULL,
+    first REAL NOT NULL,
+    last REAL NOT NULL,
+    wins INTEGER NOT NULL DEFAULT 0,
+    losses INTEGER NOT NULL DEFAULT 0,
+    ties INTEGER NOT NULL DEFAULT 0,
+    {", ".join(f"sum_{m} REAL NOT NULL DEFAULT 0, n_{m} INTEGER NOT NULL DEFAULT 0" for m in _SUMMED)},
+    PRIMARY KEY (mode, session)
+);
+CREATE INDEX IF NOT EXISTS sessions_mode_subject ON sessions (mode, subject);
+"""
+
+
+def _trial_aggregates(mode: str) -> str:
+    cols = ["COUNT(*) AS trials"] + [f"AVG({m}) AS {m}" for m in METRICS[mode]]
+    if mode == "rps":
+        cols += [f"SUM(outcome = '{o}') AS {c}" for o, c in OUTCOMES.items()]
+    return ", ".join(cols + ["MIN(t_wall) AS first", "MAX(t_wall) AS last"])
+
+
+def _session_aggregates(mode: str) -> str:
+    cols = ["SUM(trials) AS trials"] + [f"SUM(sum_{m}) / NULLIF(SUM(n_{m}), 0) AS {m}" for m in METRICS[mode]]
+    if mode == "rps":
+        cols += [f"SUM({c}) AS {c}" for c in OUTCOMES.values()]
+    return ", ".join(cols + ["MIN(first) AS first", "MAX(last) AS last"])
+
+
+# Same totals as the writer keeps, recomputed from the trials table
+_TOTALS = ("trials", "wins", "losses", "ties") + tuple(c for m in _SUMMED for c in (f"sum_{m}", f"n_{m}"))
+_REBUILD_SESSIONS = (
+    f"INSERT INTO sessions (mode, session, subject, first, last, {', '.join(_TOTALS)}) "
+    f"SELECT mode, session, MIN(subject), MIN(t_wall), MAX(t_wall), COUNT(*), "
+    + ", ".join(f"SUM(CASE WHEN outcome = '{o}' THEN 1 ELSE 0 END)" for o in OUTCOMES) + ", "
+    + ", ".join(f"TOTAL({m}), COUNT({m})" for m in _SUMMED)
+    + " FROM trials GROUP BY mode, session"
+)
+
+
+def _migrate(con: sqlite3.Connection) -> None:
+    version = con.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return
+    with con:
+        con.execute("DROP TABLE IF EXISTS sessions")
+        con.executescript(SCHEMA)
+        con.execute(_REBUILD_SESSIONS)
+        con.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+def fmt_metric(value: Optional[float], spec: str = ".3f") -> str:
+    """
+    A summary value for display; averages over no values come back as None
+    """
+    return "-" if value is None else format(value, spec)
+
+
+def _connect(path, check_same_thread: bool = True) -> sqlite3.Connection:
+    con = sqlite3.connect(str(path), timeout=10.0, check_same_thread=check_same_thread)
+    # WAL: the GUI can read summaries while the writer thread commits
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    return con
+
+
+class ResultsStore:
+    """
+    Background-thread writer plus aggregate queries for one results database.
+
+    session and subject are stamped on every row recorded through this store.
+    Record methods are safe to call from any thread. Queries use a separate
+    connection; called from the writer thread (inside after_write) they see
+    everything recorded before, elsewhere they flush first (bounded wait).
+    A failed commit does not stop the writer: its rows are counted in
+    rows_failed and the exception is kept in 'error' for the UI to show.
+    """
+
+    def __init__(self, path, session: Optional[str] = None, subject: Optional[str] = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.session = session or time.strftime("%Y%m%d-%H%M%S")
+        self.subject = subject or os.environ.get("UDS_SUBJECT", "default")
+
+        con = _connect(self.path)
+        con.executescript(SCHEMA)
+        _migrate(con)
+        con.close()
+
+        self._q: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._closed = False
+        self.rows_written = 0
+        self.rows_failed = 0
+        self.error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name="ResultsStore", daemon=True)
+        self._thread.start()
+        self._reader: Optional[sqlite3.Connection] = None
+        self._reader_lock = threading.Lock()
+
+    @classmethod
+    def open_default(cls, directory=None, session: Optional[str] = None,
+                     subject: Optional[str] = None) -> "ResultsStore":
+        """
+        results.sqlite next to the session logs in 'directory' (default: <app>/recordings)
+        """
+        directory = Path(directory or os.environ.get("UDS_RECORD_DIR", DEFAULT_DIR))
+        return cls(directory / DB_NAME, session=session, subject=subject)
+
+    #--------------------------------------------
+    # Record API
+    #--------------------------------------------
+    def record_rps(self, trial: int, result: Dict, opponent: str, outcome: str,
+                   config: Optional[Dict] = None) -> None:
+        self._put("rps", trial, config, {
+            "prediction": result.get("prediction"),
+            "opponent": opponent,
+            "outcome": outcome,
+            "confidence": result.get("confidence"),
+            "latency_first_ms": result.get("latency_first_ms"),
+            "latency_last_ms": result.get("latency_last_ms"),
+            "n_samples": result.get("n_samples"),
+            "window_ms": result.get("window_ms"),
+        })
+
+    def record_tracker(self, trial: int, metrics: Dict, config: Optional[Dict] = None) -> None:
+        self._put("tracker", trial, config, {
+            "rmse": metrics.get("rmse"),
+            "r": metrics.get("r"),
+            "lag_ms": metrics.get("lag_ms"),
+            "rmse_best_lag": metrics.get("rmse_best_lag"),
+            "n_samples": metrics.get("n"),
+            "duration_s": metrics.get("duration_s"),
+        })
+
+    def _put(self, mode: str, trial: int, config: Optional[Dict], values: Dict) -> None:
+        row = {"session": self.session, "subject": self.subject, "mode": mode, "trial": int(trial),
+               "t_wall": time.time(), "config": json.dumps(config, default=str) if config else None, **values}
+        self._q.put(tuple(row.get(c) for c in COLUMNS))
+
+    def after_write(self, fn: Callable[[], None]) -> None:
+        """
+        Run fn() on the writer thread once everything recorded so far is committed.
+
+        fn may call summary()/summary_by() and should hand results to the GUI
+        thread itself (e.g. by emitting a Qt signal).
+        """
+        self._q.put(fn)
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """
+        Block until everything recorded so far is committed; False if that took longer than timeout
+        """
+        if self._closed:
+            return True
+        if not self._thread.is_alive():
+            return False
+        done = threading.Event()
+        self._q.put(done)
+        return done.wait(timeout)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._q.put(None)
+        self._thread.join()
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    #--------------------------------------------
+    # Queries
+    #--------------------------------------------
+    def summary(self, mode: str, session: Optional[str] = None, subject: Optional[str] = None) -> Dict:
+        """
+        Aggregates over the trials of 'mode', optionally for one session and/or subject
+        """
+        if mode not in METRICS:
+            raise ValueError(f"unknown mode {mode!r}")
+        if session is not None:
+            # One session's rows are a contiguous range of the (mode, session) index
+            where, args = "mode = ? AND session = ?", [mode, session]
+            if subject is not None:
+                where += " AND subject = ?"
+                args.append(subject)
+            return self._query(f"SELECT {_trial_aggregates(mode)} FROM trials WHERE {where}", args)[0]
+        where, args = "mode = ?", [mode]
+        if subject is not None:
+            where += " AND subject = ?"
+            args.append(subject)
+        return self._query(f"SELECT {_session_aggregates(mode)} FROM sessions WHERE {where}", args)[0]
+
+    def summary_by(self, mode: str, by: str = "session", subject: Optional[str] = None) -> List[Dict]:
+        """
+        One aggregate row per session or subject, oldest first
+        """
+        if mode not in METRICS:
+            raise ValueError(f"unknown mode {mode!r}")
+        if by not in ("session", "subject"):
+            raise ValueError(f"can only group by session or subject, got {by!r}")
+        where, args = "mode = ?", [mode]
+        if subject is not None:
+            where += " AND subject = ?"
+            args.append(subject)
+        return self._query(
+            f"SELECT {by}, {_session_aggregates(mode)} FROM sessions WHERE {where} GROUP BY {by} ORDER BY first",
+            args,
+        )
+
+    def _query(self, sql: str, args) -> List[Dict]:
+        if threading.current_thread() is not self._thread:
+            self.flush()
+        with self._reader_lock:
+            if self._reader is None:
+                # Used from the writer thread (after_write) and from callers' threads, one at a time
+                self._reader = _connect(self.path, check_same_thread=False)
+                self._reader.row_factory = sqlite3.Row
+            return [dict(r) for r in self._reader.execute(sql, args).fetchall()]
+
+    #--------------------------------------------
+    # Writer thread
+    #--------------------------------------------
+    def _run(self) -> None:
+        con = _connect(self.path)
+        insert = f"INSERT INTO trials ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+        upsert = (
+            f"INSERT INTO sessions (mode, session, subject, first, last, {', '.join(_TOTALS)}) "
+            f"VALUES ({', '.join('?' * (5 + len(_TOTALS)))}) "
+            f"ON CONFLICT (mode, session) DO UPDATE SET "
+            f"first = MIN(first, excluded.first), last = MAX(last, excluded.last), "
+            + ", ".join(f"{c} = {c} + excluded.{c}" for c in _TOTALS)
+        )
+        done = False
+        while not done:
+            item = self._q.get()
+            # Everything queued since the last commit goes in one transaction
+            batch, waiters, calls = [], [], []
+            while True:
+                if item is None:
+                    done = True
+                    break
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                elif callable(item):
+                    calls.append(item)
+                else:
+                    batch.append(item)
+                try:
+                    item = self._q.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    with con:
+                        con.executemany(insert, batch)
+                        con.executemany(upsert, _session_totals(batch))
+                    self.rows_written += len(batch)
+                except Exception as e:
+                    # Keep the writer alive; the batch is lost, the error is surfaced
+                    self.rows_failed += len(batch)
+                    self._failed(e)
+            for w in waiters:
+                w.set()
+            for fn in calls:
+                try:
+                    fn()
+                except Exception as e:
+                    self._failed(e)
+        con.close()
+
+    def _failed(self, e: BaseException) -> None:
+        self.error = e
+        print(f"{self.path.name}: {type(e).__name__}: {e}", file=sys.stderr, flush=True)
+
+
+def _session_totals(batch: List[tuple]) -> List[tuple]:
+    """
+    Per-(mode, session) upsert rows for a batch of trials rows
+    """
+    col = {c: i for i, c in enumerate(COLUMNS)}
+    acc: Dict[tuple, list] = {}
+    for row in batch:
+        key = (row[col["mode"]], row[col["session"]])
+        t = row[col["t_wall"]]
+        a = acc.get(key)
+        if a is None:
+            a = acc[key] = [row[col["subject"]], t, t, 0, 0, 0, 0] + [0.0, 0] * len(_SUMMED)
+        a[1] = min(a[1], t)
+        a[2] = max(a[2], t)
+        a[3] += 1
+        if row[col["outcome"]] in OUTCOMES:
+            a[4 + list(OUTCOMES).index(row[col["outcome"]])] += 1
+        for j, m in enumerate(_SUMMED):
+            v = row[col[m]]
+            # NaN is stored as NULL, so both stay out of the average
+            if v is not None and v == v:
+                a[7 + 2 * j] += v
+                a[8 + 2 * j] += 1
+    return [(mode, session, *a) for (mode, session), a in acc.items()]
+
+
+#--------------------------------------------
+# Command line
+#--------------------------------------------
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="Per-session or per-subject trial summaries from a results database.")
+    p.add_argument("db", nargs="?", default=str(Path(os.environ.get("UDS_RECORD_DIR", DEFAULT_DIR)) / DB_NAME),
+                   help="results database (default %(default)s)")
+    p.add_argument("--mode", choices=sorted(METRICS), default="rps")
+    p.add_argument("--by", choices=("session", "subject"), default="session")
+    p.add_argument("--subject", default=None, help="only this subject")
+    args = p.parse_args(argv)
+
+    if not Path(args.db).exists():
+        print(f"No results database at {args.db}", file=sys.stderr)
+        return 1
+    store = ResultsStore(args.db)
+    try:
+        rows = store.summary_by(args.mode, args.by, subject=args.subject)
+        total = store.summary(args.mode, subject=args.subject)
+    finally:
+        store.close()
+    if not rows:
+        print(f"No {args.mode} trials", file=sys.stderr)
+        return 1
+    cols = [c for c in rows[0] if c not in ("first", "last")]
+    print("  ".join(f"{c:>16}" for c in cols))
+    for row in rows + [{args.by: "ALL", **total}]:
+        print("  ".join(f"{v:>16.4g}" if isinstance(v, float) else f"{str(v):>16}" for v in (row[c] for c in cols)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
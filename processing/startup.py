@@ -0,0 +1,66 @@
+"""
+Launch-to-usable timing for the GUI.
+
+main.py creates the profile before any heavy import, marks each startup phase,
+and ends it when the landing page first paints. Pages built later on demand
+are recorded too. Pure stdlib so importing it costs nothing.
+
+    prof = StartupProfile()
+    ...
+    prof.mark("window built")
+    ...
+    prof.mark("landing painted")
+    print(prof.report_text())
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class StartupProfile:
+    """
+    Ordered phase marks since launch, plus per-page construction times
+    """
+
+    def __init__(self, t_launch: Optional[float] = None):
+        self.t_launch = time.perf_counter() if t_launch is None else t_launch
+        self.marks: List[Tuple[str, float]] = []
+        self.pages: Dict[str, float] = {}
+
+    def mark(self, phase: str, t: Optional[float] = None) -> float:
+        """
+        Stamp the end of 'phase'; returns ms since launch
+        """
+        t = time.perf_counter() if t is None else t
+        self.marks.append((phase, t))
+        return (t - self.t_launch) * 1000.0
+
+    def page_built(self, name: str, seconds: float) -> None:
+        self.pages[name] = seconds * 1000.0
+
+    @property
+    def total_ms(self) -> float:
+        return (self.marks[-1][1] - self.t_launch) * 1000.0 if self.marks else 0.0
+
+    def summary(self) -> Dict:
+        phases = {}
+        prev = self.t_launch
+        for phase, t in self.marks:
+            phases[phase] = (t - prev) * 1000.0
+            prev = t
+        return {"total_ms": self.total_ms, "phases_ms": phases, "pages_ms": dict(self.pages)}
+
+    def report_text(self) -> str:
+        s = self.summary()
+        parts = ", ".join(f"{phase} {ms:.0f}" for phase, ms in s["phases_ms"].items())
+        line = f"Startup: {s['total_ms']:.0f} ms to landing page ({parts})"
+        if s["pages_ms"]:
+            line += "\nPages built on demand: " + ", ".join(f"{n} {ms:.0f} ms" for n, ms in s["pages_ms"].items())
+        return line
+
+    def export_json(self, path) -> None:
+        with open(path, "w") as fh:
+            json.dump(self.summary(), fh, indent=2)
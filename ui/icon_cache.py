@@ -0,0 +1,83 @@
+"""
+Shared cache of the SVG icons under assets/, pre-rendered to pixmaps.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QGuiApplication, QPainter, QPixmap
+from PySide6.QtSvg import QSvgRenderer
+
+ASSETS_DIR = Path(__file__).resolve().parent.parent / "assets"
+
+
+class IconCache:
+    """
+    Parses every assets/<group>/<name>.svg once and hands out pixmaps per (group, name, size).
+
+    Pixmaps are rendered at the screen's device pixel ratio on first request (or
+    up front with warm()) and reused afterwards, so swapping an icon is a plain
+    QLabel.setPixmap with no disk access or SVG parsing.
+    """
+
+    def __init__(self, root: Path = ASSETS_DIR):
+        self._renderers: Dict[Tuple[str, str], QSvgRenderer] = {}
+        self._pixmaps: Dict[Tuple[str, str, int], QPixmap] = {}
+        for svg_path in sorted(Path(root).glob("*/*.svg")):
+            renderer = QSvgRenderer(str(svg_path))
+            if renderer.isValid():
+                self._renderers[(svg_path.parent.name, svg_path.stem.lower())] = renderer
+
+    def has(self, group: str, name: str) -> bool:
+        return (group, name.lower()) in self._renderers
+
+    def pixmap(self, group: str, name: str, size: int, fallback: Optional[str] = None) -> Optional[QPixmap]:
+        """
+        'name' from 'group' as a size x size pixmap; 'fallback' if it doesn't exist, else None
+        """
+        name = name.lower()
+        if (group, name) not in self._renderers:
+            if fallback is None or (group, fallback) not in self._renderers:
+                return None
+            name = fallback
+        key = (group, name, size)
+        pm = self._pixmaps.get(key)
+        if pm is None:
+            pm = self._pixmaps[key] = self._render(self._renderers[(group, name)], size)
+        return pm
+
+    def warm(self, group: str, size: int) -> None:
+        """
+        Pre-render every icon in 'group' at 'size'
+        """
+        for g, name in self._renderers:
+            if g == group:
+                self.pixmap(g, name, size)
+
+    @staticmethod
+    def _render(renderer: QSvgRenderer, size: int) -> QPixmap:
+        dpr = QGuiApplication.instance().devicePixelRatio() if QGuiApplication.instance() else 1.0
+        pm = QPixmap(int(round(size * dpr)), int(round(size * dpr)))
+        pm.fill(Qt.transparent)
+        painter = QPainter(pm)
+        painter.setRenderHint(QPainter.Antialiasing)
+        renderer.render(painter)
+        painter.end()
+        pm.setDevicePixelRatio(dpr)
+        return pm
+
+
+_shared: Optional[IconCache] = None
+
+
+def shared_icons() -> IconCache:
+    """
+    Process-wide IconCache, built on first use (needs a QGuiApplication)
+    """
+    global _shared
+    if _shared is None:
+        _shared = IconCache()
+    return _shared
@@ -1,43 +1,157 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+from dataclasses import asdict
+from pathlib import Path
+
 from PySide6.QtWidgets import QMainWindow, QWidget, QStackedWidget
+from app.processing.startup import StartupProfile
 from app.ui.landing_page import LandingPage
-from app.ui.rps_page import RPSPage
-from app.ui.tracker_page import TrackerPage
-from app.ui.test_mode_page import TestModePage
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, startup: StartupProfile | None = None):
         super().__init__()
         self.setWindowTitle("Ultrasound Demo Interface")
         self.resize(900,520)
 
+        # Launch timing; pages built later report their construction time here too.
+        # Saved on exit next to the session log, or under the launch time if there is none
+        self.startup = startup or StartupProfile()
+        self._launch_stamp = time.strftime("%Y%m%d-%H%M%S")
+
         self.stack = QStackedWidget()
         self.setCentralWidget(self.stack)
 
-        # Pages
+        # Page lifecycle: the page leaving gets deactivate(), the one shown activate() (both optional)
+        self._active: QWidget | None = None
+        self.stack.currentChanged.connect(self._on_page_changed)
+
+        # Pages: only the landing page is built up front, the rest (and their imports,
+        # e.g. pyqtgraph for the tracker) on first visit
         self.landing = LandingPage(
             on_rps_clicked=self._go_rps,
             on_tracker_clicked=self._go_tracker,
             on_test_clicked=self._go_test
         )
-        self.rps = RPSPage(on_back_clicked=self._go_landing)
-        self.tracker = TrackerPage(on_back_clicked=self._go_landing)
-        self.test_mode = TestModePage(on_back_clicked=self._go_landing)
+        self.rps = None
+        self.tracker = None
+        self.test_mode = None
 
-        self.stack.addWidget(self.landing)   # index 0
-        self.stack.addWidget(self.rps)       # index 1
-        self.stack.addWidget(self.tracker)   # index 2
-        self.stack.addWidget(self.test_mode) # index 3
+        # Session log, stage latency histograms and per-trial results database,
+        # opened with the first page that uses them
+        self.recorder = None
+        self.latency = None
+        self.results = None
 
+        self.stack.addWidget(self.landing)   # index 0
         self.stack.setCurrentIndex(0)
 
+    def closeEvent(self, event):
+        # Stops the active page's timers/workers before the session log closes
+        self._set_active(None)
+        self._export_startup()
+        if self.recorder is not None:
+            if self.latency.summary():
+                self.latency.export_json(self.recorder.path.with_suffix(".latency.json"))
+            self._export_session_config(self.recorder.path.with_suffix(".config.json"))
+            self.recorder.close()
+            self.results.close()
+        super().closeEvent(event)
+
+    def _on_page_changed(self, index: int):
+        self._set_active(self.stack.widget(index))
+
+    def _set_active(self, page: QWidget | None):
+        if page is self._active:
+            return
+        previous, self._active = self._active, page
+        if previous is not None and hasattr(previous, "deactivate"):
+            previous.deactivate()
+        if page is not None and hasattr(page, "activate"):
+            page.activate()
+
+    def _session(self):
+        """
+        Always-on session log, latency monitor and results database shared by the pages
+        """
+        if self.recorder is None:
+            from app.processing.latency import LatencyMonitor
+            from app.processing.recorder import SessionRecorder
+            from app.processing.results_store import ResultsStore
+            self.recorder = SessionRecorder.open_default()
+            self.latency = LatencyMonitor()
+            # Results rows carry the session log's name, so the two can be joined later
+            self.results = ResultsStore.open_default(session=self.recorder.path.stem)
+        return self.recorder, self.latency, self.results
+
+    def _export_startup(self):
+        """
+        <session>.startup.json, also for launches that never opened a page with a session log
+        """
+        if self.recorder is not None:
+            path = self.recorder.path.with_suffix(".startup.json")
+        else:
+            from app.processing.recorder import DEFAULT_DIR
+            directory = Path(os.environ.get("UDS_RECORD_DIR", DEFAULT_DIR))
+            path = directory / (self._launch_stamp + ".startup.json")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self.startup.export_json(path)
+        except OSError as e:
+            # Nowhere to write it: keep the measurement on stderr instead
+            print(f"{path}: {e}\n{self.startup.report_text()}", file=sys.stderr, flush=True)
+
+    def _export_session_config(self, path):
+        """
+        Mode parameters of the pages used this session, for replaying the log (processing/replay.py)
+        """
+        config = {}
+        if self.rps is not None:
+            mode = self.rps.mode
+            config["rps_params"] = {
+                "window_ms": mode.window_ms, "k_samples": mode.k_samples, "countdown_ms": mode.countdown_ms,
+            }
+        if self.tracker is not None:
+            config["tracker_config"] = asdict(self.tracker.mode.cfg)
+        with open(path, "w") as fh:
+            json.dump(config, fh, indent=2)
+
+    def _show_page(self, attr: str, build):
+        page = getattr(self, attr)
+        if page is None:
+            t0 = time.perf_counter()
+            page = build()
+            self.stack.addWidget(page)
+            setattr(self, attr, page)
+            self.startup.page_built(attr, time.perf_counter() - t0)
+        self.stack.setCurrentWidget(page)
+
+    def _build_rps(self) -> QWidget:
+        from app.ui.rps_page import RPSPage
+        recorder, latency, results = self._session()
+        return RPSPage(on_back_clicked=self._go_landing, recorder=recorder, latency=latency, results=results)
+
+    def _build_tracker(self) -> QWidget:
+        from app.ui.tracker_page import TrackerPage
+        recorder, latency, results = self._session()
+        return TrackerPage(on_back_clicked=self._go_landing, recorder=recorder, latency=latency,
+                           results=results)
+
+    def _build_test_mode(self) -> QWidget:
+        from app.ui.test_mode_page import TestModePage
+        return TestModePage(on_back_clicked=self._go_landing)
+
     def _go_landing(self):
-        self.stack.setCurrentIndex(0)
+        self.stack.setCurrentWidget(self.landing)
 
     def _go_rps(self):
-        self.stack.setCurrentIndex(1)
+        self._show_page("rps", self._build_rps)
 
     def _go_tracker(self):
-        self.stack.setCurrentIndex(2)
+        self._show_page("tracker", self._build_tracker)
 
     def _go_test(self):
-        self.stack.setCurrentIndex(3)
\ No newline at end of file
+        self._show_page("test_mode", self._build_test_mode)
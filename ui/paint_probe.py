@@ -0,0 +1,24 @@
+import time
+
+from PySide6.QtCore import QObject, QEvent
+
+
+class PaintProbe(QObject):
+    """
+    Reports when a widget actually paints: after arm(callback), the next Paint
+    event on the watched widget calls callback(perf_counter()) once.
+    """
+
+    def __init__(self, widget, parent=None):
+        super().__init__(parent or widget)
+        self._callback = None
+        widget.installEventFilter(self)
+
+    def arm(self, callback):
+        self._callback = callback
+
+    def eventFilter(self, obj, event):
+        if self._callback is not None and event.type() == QEvent.Paint:
+            callback, self._callback = self._callback, None
+            callback(time.perf_counter())
+        return False
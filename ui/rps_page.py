@@ -1,18 +1,27 @@
 import random 
 import time
 import queue
-from pathlib import Path
+import threading
 
 from PySide6.QtCore import QObject, Signal, QThread, QTimer, Qt 
 from PySide6.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QFrame
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QFrame, QSpinBox
 )
-from PySide6.QtSvgWidgets import QSvgWidget
 
+from app.io_adapters.protocol import BatchedReadMixin
 from app.modes.rps_mode import RPSMode
+from app.modes.histogram import BinnedSketch, LatencyHistogram
+from app.processing.latency import LatencyMonitor
+from app.processing.recorder import MODE_RPS, SessionRecorder
+from app.processing.results_store import ResultsStore, fmt_metric
+from app.ui.icon_cache import shared_icons
+from app.ui.paint_probe import PaintProbe
 
 RPS = ("ROCK", "PAPER", "SCISSORS")
 
+# Confidence sketch bins: 0.01 wide and centred on each hundredth, so votes/total reads back exactly
+CONFIDENCE_EDGES = [(i - 0.5) / 100.0 for i in range(102)]
+
 def pick_opponent():
     return random.choice(RPS)
 
@@ -28,17 +37,22 @@ def outcome(user: str, opp: str) -> str:
     }
     return "WIN" if wins_over[user] == opp else "LOSE"
 
-class KeyBuffer:
+class KeyBuffer(BatchedReadMixin):
     """ Non-Blocking key buffer for r/p/s tokens."""
     def __init__(self):
         self._q = queue.Queue()
 
-    def push(self, token: str):
-        self._q.put((token, time.perf_counter()))
+    def push(self, token: str) -> float:
+        t = time.perf_counter()
+        self._q.put((token, t))
+        return t
 
-    def read(self):
+    def read(self, timeout: float | None = None):
+        """ Next (token, t); waits up to 'timeout' seconds when given, otherwise returns at once."""
         try:
-            return self._q.get_nowait()
+            if timeout is None:
+                return self._q.get_nowait()
+            return self._q.get(timeout=timeout)
         except queue.Empty:
             return (None, None)
         
@@ -46,25 +60,102 @@ class KeyBuffer:
         with self._q.mutex:
             self._q.queue.clear()
 
-#--------------------------------Worker To Run Single Trial-----------------------------
+    def wake(self):
+        """ Unblock a waiting read() with an empty (None, None) sample."""
+        self._q.put((None, None))
+
+#--------------------------------Long-Lived Trial Worker-----------------------------
 class TrialWorker(QObject):
+    """
+    Runs RPS trials on one thread for the life of the page, taking requests from a queue.
+
+    submit(trial, gap_s) queues a trial that starts gap_s after the previous one
+    decided, so back-to-back runs need no thread or worker setup per trial.
+    before_trial(trial) is called on the worker thread right before each trial
+    (e.g. to clear the key buffer); it must be thread-safe.
+    """
+    trial_started = Signal(int, float) # Emits (trial index, perf_counter at start)
     finished = Signal(dict, str) # Emits (result_dict, opponent_choice)
 
-    def __init__(self, mode: RPSMode, read_fn):
+    def __init__(self, mode: RPSMode, read_fn, blocking: bool = False, wake_fn=None, before_trial=None):
         super().__init__()
         self.mode = mode
         self.read_fn = read_fn
+        self.blocking = blocking
+        self.wake_fn = wake_fn
+        self.before_trial = before_trial
+        self._requests = queue.Queue()
+        self._stop = threading.Event()
+        # Bumped by cancel_pending(); a request from an older generation is skipped
+        self._gen = 0
+        # Trials started so far; counted under the same lock as cancel_pending()
+        self._lock = threading.Lock()
+        self.started = 0
+
+    def submit(self, trial: int, gap_s: float = 0.0):
+        self._requests.put((self._gen, trial, gap_s))
+
+    def cancel_pending(self) -> int:
+        """ Drop queued trials (a trial already running still finishes); returns trials started so far."""
+        with self._lock:
+            self._gen += 1
+            with self._requests.mutex:
+                self._requests.queue.clear()
+            return self.started
+
+    def stop(self):
+        """ Cancel everything, end a running trial early without reporting it, and exit run()."""
+        self._stop.set()
+        self.cancel_pending()
+        self._requests.put(None)
+        if self.wake_fn is not None:
+            self.wake_fn()
 
     def run(self):
-        opp = pick_opponent()
-        result = self.mode.run_trial(self.read_fn)
-        self.finished.emit(result, opp)
+        while True:
+            req = self._requests.get()
+            if req is None or self._stop.is_set():
+                break
+            gen, trial, gap_s = req
+            if gap_s > 0 and self._stop.wait(gap_s):
+                break
+            with self._lock:
+                if gen != self._gen:
+                    continue
+                # Counted before any signal, so cancel_pending() sees it even while trial_started is queued
+                self.started += 1
+            if self.before_trial is not None:
+                self.before_trial(trial)
+            self.trial_started.emit(trial, time.perf_counter())
+            opp = pick_opponent()
+            result = self.mode.run_trial(self.read_fn, blocking=self.blocking, cancel_fn=self._stop.is_set)
+            if self._stop.is_set():
+                break
+            self.finished.emit(result, opp)
 
 #----------------------------------RPS Page UI-------------------------------------------
 class RPSPage(QWidget):
-    def __init__(self, on_back_clicked, parent=None):
+    GESTURE_ICON_SIZE = 140
+    OUTCOME_ICON_SIZE = 100
+
+    # (session summary, all-session summary, session count), emitted from the results writer thread;
+    # (None, exception, 0) if the queries failed
+    _results_ready = Signal(object, object, int)
+
+    def __init__(self, on_back_clicked, parent=None, recorder: SessionRecorder | None = None,
+                 latency: LatencyMonitor | None = None, results: ResultsStore | None = None):
         super().__init__(parent)
 
+        # Session log for inputs and decisions (optional)
+        self.recorder = recorder
+
+        # Per-trial results database (optional); the summary report queries it
+        self.results = results
+        self._results_ready.connect(self._show_results_summary)
+
+        # input -> decision -> delivered -> painted latency histograms
+        self.latency = latency or LatencyMonitor()
+
         self.mode = RPSMode(countdown_ms=0, window_ms=2000, k_samples=5)
         
         # Input buffer for GUI-Captured keys
@@ -76,22 +167,22 @@ class RPSPage(QWidget):
         self.lose_count = 0
         self.tie_count = 0
 
-        # Running sums for summary report 
+        # Running sums for summary report when there is no results database
         self._trial_count = 0
         self._sum_conf = 0.0
         self._sum_lat_last = 0.0
         self._sum_lat_first = 0.0
         self._sum_n = 0
 
-        # SVG  gesture Icons Directory
-        self._gesture_icon_dir = (
-            Path(__file__).resolve().parent.parent / "assets" / "gestures"
-        )
+        # Streaming sketches behind the summary's percentiles and histograms (bounded, O(1) per trial)
+        self._lat_first_sketch = LatencyHistogram()
+        self._lat_last_sketch = LatencyHistogram()
+        self._conf_sketch = BinnedSketch(CONFIDENCE_EDGES)
 
-        # SVG W/L/T icons directory 
-        self._other_icon_dir = (
-            Path(__file__).resolve().parent.parent / "assets" / "other"
-        )
+        # Gesture and W/L/T icons, parsed once and pre-rendered at the sizes used below
+        self._icons = shared_icons()
+        self._icons.warm("gestures", self.GESTURE_ICON_SIZE)
+        self._icons.warm("other", self.OUTCOME_ICON_SIZE)
 
         # Title
         title = QLabel("Rock-Paper-Scissors")
@@ -141,11 +232,42 @@ class RPSPage(QWidget):
         self.summary_btn.setFixedHeight(36)
         self.summary_btn.clicked.connect(self._generate_summary)
 
+        self.latency_btn = QPushButton("Latency Report")
+        self.latency_btn.setFixedHeight(36)
+        self.latency_btn.clicked.connect(self._show_latency_report)
+
+        # Auto-run: N trials back to back on the same worker, 'gap' ms apart
+        self.auto_count = QSpinBox()
+        self.auto_count.setRange(1, 1000)
+        self.auto_count.setValue(20)
+        self.auto_count.setPrefix("Trials: ")
+        self.auto_count.setFocusPolicy(Qt.ClickFocus)
+
+        self.auto_gap = QSpinBox()
+        self.auto_gap.setRange(0, 10000)
+        self.auto_gap.setSingleStep(100)
+        self.auto_gap.setValue(500)
+        self.auto_gap.setPrefix("Gap: ")
+        self.auto_gap.setSuffix(" ms")
+        self.auto_gap.setFocusPolicy(Qt.ClickFocus)
+
+        self.auto_btn = QPushButton("Auto Run")
+        self.auto_btn.setFixedHeight(36)
+        self.auto_btn.clicked.connect(self._toggle_auto_run)
+
+        auto_row = QHBoxLayout()
+        auto_row.addStretch()
+        auto_row.addWidget(self.auto_count)
+        auto_row.addWidget(self.auto_gap)
+        auto_row.addWidget(self.auto_btn)
+        auto_row.addStretch()
+
         btn_row = QHBoxLayout()
         btn_row.addStretch()
         btn_row.addWidget(self.start_btn)
         btn_row.addWidget(self.next_btn)
         btn_row.addWidget(self.summary_btn)
+        btn_row.addWidget(self.latency_btn)
         btn_row.addWidget(self.back_btn)
         btn_row.addStretch()
 
@@ -160,13 +282,28 @@ class RPSPage(QWidget):
         root.addWidget(self.metrics)
         root.addSpacing(8)
         root.addLayout(btn_row)
+        root.addLayout(auto_row)
         root.addStretch()
         self.setLayout(root)
 
-        # Thread Placeholders
+        # Stamps the first repaint of the prediction box after a result
+        self._paint_probe = PaintProbe(self.your_pred_box)
+
+        # Trial worker thread, started with the first trial and kept until the page is left
         self._thread: QThread | None = None
         self._worker: TrialWorker | None = None
 
+        # Auto-run state (total 0 = manual trials); trials are counted from the worker's 'started' at launch
+        self._auto_total = 0
+        self._auto_started_base = 0
+        self._auto_done = 0
+        self._auto_gap_s = 0.0
+        self._auto_t_first = None
+        self._auto_t_last = None
+        self._auto_overhead_s = 0.0
+        self._last_decision = None
+        self._last_run_report = ""
+
         # Countdown
         self._countdown_timer = QTimer(self)
         self._countdown_timer.setInterval(1000)
@@ -197,24 +334,20 @@ class RPSPage(QWidget):
             v.addWidget(vlabel)
             v.addWidget(self.score_label)
 
-            # Add SVG icon
-            icon = QSvgWidget()
-            icon.setFixedSize(100, 100)
+            # Add W/L/T icon
+            icon = self._icon_label(self.OUTCOME_ICON_SIZE)
             v.addWidget(icon, alignment=Qt.AlignCenter)
             frame._icon_widget = icon
         else:
             v.addWidget(hlabel)
             v.addWidget(vlabel)
 
-            icon = QSvgWidget()
-            icon.setFixedSize(140, 140)
+            icon = self._icon_label(self.GESTURE_ICON_SIZE)
 
-            # Load default REST
-            rest_icon = getattr(self, "_gesture_icon_dir", None)
-            if rest_icon is not None:
-                svg_path = self._gesture_icon_dir / "rest.svg"
-                if svg_path.exists():
-                    icon.load(str(svg_path))
+            # Default REST
+            pm = self._icons.pixmap("gestures", "rest", self.GESTURE_ICON_SIZE)
+            if pm is not None:
+                icon.setPixmap(pm)
 
             v.addWidget(icon, alignment=Qt.AlignCenter)
             frame._icon_widget = icon
@@ -222,29 +355,31 @@ class RPSPage(QWidget):
         frame._value_label = vlabel # Store for updates
         return frame 
     
+    @staticmethod
+    def _icon_label(size: int) -> QLabel:
+        icon = QLabel()
+        icon.setFixedSize(size, size)
+        icon.setScaledContents(True)
+        # Don't inherit the box's QFrame border
+        icon.setStyleSheet("border: none;")
+        return icon
+
     def _set_box_value(self, box: QFrame, text: str):
         box._value_label.setText(text)
 
     def _update_gesture_icon(self, box: QFrame, gesture: str):
         """
-        Load the proper svg icon 
+        Show the cached gesture icon (REST if there is none for 'gesture')
         """
         icon = getattr(box, "_icon_widget", None)
         if icon is None:
             return
-        if not hasattr(self, "_gesture_icon_dir"):
-            return
         
-        filename = gesture.lower() + ".svg"
-        svg_path = self._gesture_icon_dir / filename
-
-        if not svg_path.exists():
-            svg_path = self._gesture_icon_dir / "rest.svg"
-            if not svg_path.exists():
-                return
+        pm = self._icons.pixmap("gestures", gesture, self.GESTURE_ICON_SIZE, fallback="rest")
+        if pm is None:
+            return
         
-        icon.load(str(svg_path))
-        icon.update()
+        icon.setPixmap(pm)
 
     def _update_outcome_icon(self, outcome: str):
         """
@@ -255,56 +390,155 @@ class RPSPage(QWidget):
         if icon is None:
             return
         
-        if not hasattr(self, "_other_icon_dir"):
-            return
-        
-        filename = None
-        if outcome == "WIN":
-            filename = "win.svg"
-        elif outcome == "LOSE":
-            filename = "lose.svg"
-        elif outcome == "TIE":
-            filename = "tie.svg"
-
-        if filename:
-            svg_path = self._other_icon_dir / filename
-            if svg_path.exists():
-                icon.load(str(svg_path))
-                icon.show()
-            else:
-                icon.hide()
+        pm = None
+        if outcome in ("WIN", "LOSE", "TIE"):
+            pm = self._icons.pixmap("other", outcome, self.OUTCOME_ICON_SIZE)
+
+        if pm is not None:
+            icon.setPixmap(pm)
+            icon.show()
         else:
             icon.hide()
 
 
+    #-------------------------Page Lifecycle----------------------------
+    def activate(self):
+        self.setFocus()
+
+    def deactivate(self):
+        """
+        Leaving the page cancels a countdown or auto-run, stops the trial worker (a
+        running trial is cut short and not counted) and releases the keyboard.
+        """
+        if self._countdown_timer.isActive():
+            self._countdown_timer.stop()
+            self.status.setText("Trial cancelled")
+        self._stop_worker()
+        if self._auto_total:
+            self._finish_auto_run()
+        self._set_controls_idle(True)
+        self.releaseKeyboard()
+
     #-------------------------Trial Control----------------------------
     def keyPressEvent(self, event):
         ch = event.text().lower()
         if ch in ("r", "p", "s"):
             mapping = {"r" : "ROCK", "p" : "PAPER", "s" : "SCISSORS"}
-            self.key_buffer.push(mapping[ch])
+            t = self.key_buffer.push(mapping[ch])
+            if self.recorder is not None:
+                self.recorder.input_token(mapping[ch], t)
     
     def _start_trial(self):
         # UI State
-        self.start_btn.setEnabled(False)
-        self.next_btn.setEnabled(False)
-        self._set_box_value(self.your_pred_box, "-")
-        self._set_box_value(self.outcome_box, "-")
-        self._set_box_value(self.opp_box, "-")
-        self._update_gesture_icon(self.your_pred_box, "REST")
-        self._update_gesture_icon(self.opp_box, "REST")
-        self._update_outcome_icon("")
-        self.metrics.setText("Confidence: -  Latency(last): - ms  Latency(first): - ms  (n=-, window=- ms )")
+        self._set_controls_idle(False)
+        self._reset_boxes()
         self.status.setText("Get ready...")
         self.setFocus()
         self.grabKeyboard()
         self.key_buffer.clear()
 
-        # Start Worker thread to run a blocking trial
+        # Countdown, then hand the trial(s) to the worker thread
         self._countdown_remaining = 3
         self._update_countdown_label()
         self._countdown_timer.start()
 
+    def _set_controls_idle(self, idle: bool):
+        self.start_btn.setEnabled(idle)
+        self.next_btn.setEnabled(idle and self._trial_count > 0)
+        self.auto_count.setEnabled(idle)
+        self.auto_gap.setEnabled(idle)
+        # While busy the auto button stays usable only as "Stop" for an auto-run
+        auto_running = not idle and bool(self._auto_total)
+        self.auto_btn.setText("Stop Auto Run" if auto_running else "Auto Run")
+        self.auto_btn.setEnabled(idle or auto_running)
+
+    def _reset_boxes(self):
+        self._set_box_value(self.your_pred_box, "-")
+        self._set_box_value(self.outcome_box, "-")
+        self._set_box_value(self.opp_box, "-")
+        self._update_gesture_icon(self.your_pred_box, "REST")
+        self._update_gesture_icon(self.opp_box, "REST")
+        self._update_outcome_icon("")
+        self.metrics.setText("Confidence: -  Latency(last): - ms  Latency(first): - ms  (n=-, window=- ms )")
+
+    #-------------------------Auto Run----------------------------
+    def _toggle_auto_run(self):
+        if self._auto_total:
+            self._stop_auto_run()
+            return
+        self._auto_total = self.auto_count.value()
+        self._auto_done = 0
+        self._auto_gap_s = self.auto_gap.value() / 1000.0
+        self._auto_t_first = None
+        self._auto_t_last = None
+        self._auto_overhead_s = 0.0
+        self._last_decision = None
+        self._start_trial()
+
+    def _stop_auto_run(self):
+        """ Keep the trials the worker has already started, drop the rest."""
+        if self._countdown_timer.isActive():
+            # Nothing was submitted yet
+            self._countdown_timer.stop()
+            self.releaseKeyboard()
+            self._auto_total = self._auto_done
+        elif self._worker is not None:
+            # The worker's count includes a trial whose trial_started signal is still queued
+            self._auto_total = self._worker.cancel_pending() - self._auto_started_base
+        else:
+            self._auto_total = self._auto_done
+        if self._auto_done >= self._auto_total:
+            self._finish_auto_run()
+            self._set_controls_idle(True)
+
+    def _finish_auto_run(self):
+        done = self._auto_done
+        if done and self._auto_t_first is not None:
+            elapsed_s = self._auto_t_last - self._auto_t_first
+            rate = done / elapsed_s * 60.0 if elapsed_s > 0 else 0.0
+            overhead_ms = self._auto_overhead_s / (done - 1) * 1000.0 if done > 1 else 0.0
+            self._last_run_report = (
+                f"Auto-run: {done} trials in {elapsed_s:.1f} s = {rate:.1f} trials/min  "
+                f"(gap {self._auto_gap_s * 1000.0:.0f} ms, setup overhead {overhead_ms:.2f} ms/trial)"
+            )
+            self.status.setText(self._last_run_report)
+        else:
+            self.status.setText("Auto-run stopped.")
+        self._auto_total = 0
+        self.releaseKeyboard()
+
+    #-------------------------Trial Worker----------------------------
+    def _ensure_worker(self) -> TrialWorker:
+        if self._worker is None:
+            self._thread = QThread()
+            self._worker = TrialWorker(
+                self.mode, self.key_buffer.read, blocking=True,
+                wake_fn=self.key_buffer.wake, before_trial=self._before_trial,
+            )
+            self._worker.moveToThread(self._thread)
+            self._thread.started.connect(self._worker.run)
+            self._worker.trial_started.connect(self._trial_started)
+            self._worker.finished.connect(self._trial_finished)
+            self._thread.start()
+        return self._worker
+
+    def _stop_worker(self):
+        worker = self._worker
+        if worker is None:
+            return
+        worker.stop()
+        self._thread.quit()
+        self._thread.wait()
+        # Both are unparented and the thread has finished: dropping them frees them
+        self._thread = None
+        self._worker = None
+
+    def _before_trial(self, trial: int):
+        """ Worker thread, right before a trial: drop stale keys and log the start."""
+        self.key_buffer.clear()
+        if self.recorder is not None:
+            self.recorder.trial_start(MODE_RPS, trial, time.perf_counter())
+
     def _countdown_tick(self):
         self._countdown_remaining -= 1
         if self._countdown_remaining > 0:
@@ -320,21 +554,43 @@ class RPSPage(QWidget):
         self.status.setText(f"{self._countdown_remaining}...")
 
     def _launch_worker(self):
-        # Launch trial worker
-        self._thread = QThread()
-        self._worker = TrialWorker(self.mode, self.key_buffer.read)
-        self._worker.moveToThread(self._thread)
-        self._thread.started.connect(self._worker.run)
-        self._worker.finished.connect(self._trial_finished)
-        self._worker.finished.connect(self._thread.quit)
-        self._worker.finished.connect(self._worker.deleteLater)
-        self._thread.finished.connect(self._thread.deleteLater)
-        self._thread.start()
+        """ Queue the manual trial, or the whole auto-run, on the long-lived worker."""
+        worker = self._ensure_worker()
+        self._auto_started_base = worker.started
+        if not self._auto_total:
+            worker.submit(self._trial_count)
+            return
+        for i in range(self._auto_total):
+            worker.submit(self._trial_count + i, self._auto_gap_s if i else 0.0)
+
+    def _trial_started(self, trial: int, t_start: float):
+        if not self._auto_total:
+            return
+        if self._auto_t_first is None:
+            self._auto_t_first = t_start
+        elif self._last_decision is not None:
+            # Time between trials beyond the requested gap
+            self._auto_overhead_s += max(0.0, t_start - self._last_decision - self._auto_gap_s)
+        self._reset_boxes()
+        self.status.setText(f"Go! (Press R / P / S)   trial {self._auto_done + 1}/{self._auto_total}")
 
     def _trial_finished(self, result: dict, opponent: str):
+        t_delivered = time.perf_counter()
+        trace = self._trial_count
+        t_decision = result.get("t_decision")
+        if t_decision is not None:
+            if result.get("n_samples", 0):
+                self.latency.begin("rps", trace, "input", t_decision - result["latency_last_ms"] / 1000.0)
+                self.latency.mark("rps", trace, "decision", t_decision)
+            else:
+                self.latency.begin("rps", trace, "decision", t_decision)
+            self.latency.mark("rps", trace, "delivered", t_delivered)
+            self._paint_probe.arm(lambda t: self.latency.end("rps", trace, "painted", t))
+
         # Update UI With Results
-        self.releaseKeyboard()
         user_choice = result["prediction"]
+        if self.recorder is not None:
+            self.recorder.decision(self._trial_count, result, time.perf_counter())
 
         self._set_box_value(self.your_pred_box, user_choice)
         self._update_gesture_icon(self.your_pred_box, user_choice)
@@ -351,6 +607,13 @@ class RPSPage(QWidget):
         else:
             self.tie_count += 1
 
+        if self.results is not None:
+            self.results.record_rps(self._trial_count, result, opponent, out, {
+                "window_ms": self.mode.window_ms,
+                "k_samples": self.mode.k_samples,
+                "countdown_ms": self.mode.countdown_ms,
+            })
+
         lat_last = result.get("latency_last_ms", result.get("latency_ms", 0.0))
         lat_first = result.get("latency_first_ms", 0.0)
         self._trial_count += 1
@@ -358,6 +621,11 @@ class RPSPage(QWidget):
         self._sum_lat_last += lat_last
         self._sum_lat_first += lat_first
         self._sum_n += result.get("n_samples", 0)
+        if result.get("n_samples", 0):
+            # No-input trials have no input-to-decision latency
+            self._lat_last_sketch.add(lat_last)
+            self._lat_first_sketch.add(lat_first)
+        self._conf_sketch.add(result.get("confidence", 0.0))
 
         self._set_box_value(self.outcome_box, out)
         self._update_outcome_icon(out)
@@ -376,15 +644,42 @@ class RPSPage(QWidget):
             f"(n={result['n_samples']}, window = {result['window_ms']} ms)"
         )
 
-        self.status.setText("Trial Complete.")
-        self.start_btn.setEnabled(True)
-        self.next_btn.setEnabled(True)
+        if not self._auto_total:
+            self.releaseKeyboard()
+            self.status.setText("Trial Complete.")
+            self._set_controls_idle(True)
+            return
+
+        self._auto_done += 1
+        self._auto_t_last = t_delivered
+        self._last_decision = result.get("t_decision", t_delivered)
+        if self._auto_done >= self._auto_total:
+            self._finish_auto_run()
+            self._set_controls_idle(True)
+        else:
+            elapsed_s = t_delivered - self._auto_t_first
+            rate = self._auto_done / elapsed_s * 60.0 if elapsed_s > 0 else 0.0
+            self.status.setText(f"Trial {self._auto_done}/{self._auto_total} done   {rate:.1f} trials/min")
+
+    def _show_latency_report(self):
+        """
+        Show per-stage p50/p95/p99 and export the histograms next to the session log
+        """
+        text = self.latency.report_text()
+        if self.recorder is not None:
+            path = self.recorder.path.with_suffix(".latency.json")
+            self.latency.export_json(path)
+            text += f"\nExported to {path.name}"
+        self.summary_label.setText(text)
 
     def _generate_summary(self):
         """
         Compute and display a summary report across all completed trials
         """
-                    
+        if self.results is not None:
+            self._generate_results_summary()
+            return
+
         if self._trial_count == 0:
             self.summary_label.setText("Summary Not Available, No Trials Yet.")
             return 
@@ -400,7 +695,71 @@ class RPSPage(QWidget):
             f"Average N_Samples: {avg_n:.1f} |"
             f"\nAverage Latency (last input to decision): {avg_lat_last:.1f} ms  "
             f"\nAverage Latency (first input to decision): {avg_lat_first:.1f} ms  "   
+            + self._distribution_report()
+            + (f"\n{self._last_run_report}" if self._last_run_report else "")
         )
 
+    def _generate_results_summary(self):
+        """
+        Session summary plus all of this subject's sessions, as aggregate queries
+        on the results database; they run on its writer thread after the pending
+        trials are committed, and the report is filled in when they return
+        """
+        store = self.results
+        if store.error is not None:
+            self.summary_label.setText(f"Results database error: {store.error}")
+            return
+        self.summary_label.setText("Computing summary...")
+
+        def summarize():
+            try:
+                session = store.summary("rps", session=store.session)
+                overall = store.summary("rps", subject=store.subject)
+                n_sessions = len(store.summary_by("rps", "session", subject=store.subject))
+            except Exception as e:
+                self._results_ready.emit(None, e, 0)
+                raise
+            self._results_ready.emit(session, overall, n_sessions)
+
+        store.after_write(summarize)
+
+    def _show_results_summary(self, session: dict | None, overall, n_sessions: int):
+        if session is None:
+            self.summary_label.setText(f"Results database error: {overall}")
+            return
+        if not session["trials"]:
+            self.summary_label.setText("Summary Not Available, No Trials Yet.")
+            return
+        self.summary_label.setText(
+            f"| Number of Trials: {session['trials']}  | "
+            f"Average Confidence: {fmt_metric(session['confidence'], '.2f')}  | "
+            f"Average N_Samples: {fmt_metric(session['n_samples'], '.1f')} |"
+            f"\nAverage Latency (last input to decision): {fmt_metric(session['latency_last_ms'], '.1f')} ms  "
+            f"\nAverage Latency (first input to decision): {fmt_metric(session['latency_first_ms'], '.1f')} ms  "
+            f"\nAll sessions ({n_sessions}): {overall['trials']} trials  "
+            f"W/L/T {overall['wins']}/{overall['losses']}/{overall['ties']}  "
+            f"confidence {fmt_metric(overall['confidence'], '.2f')}  "
+            f"latency(last) {fmt_metric(overall['latency_last_ms'], '.1f')} ms"
+            + self._distribution_report()
+            + (f"\n{self._last_run_report}" if self._last_run_report else "")
+            + (f"\nResults database error: {self.results.error}" if self.results.error is not None else "")
+        )
 
-        
\ No newline at end of file
+    def _distribution_report(self) -> str:
+        """
+        p50/p90/p99 and a compact histogram per sketch, read from the bin counts
+        """
+        lines = ""
+        for label, sketch, fmt, unit in (
+            ("Latency (last)", self._lat_last_sketch, ".1f", " ms"),
+            ("Latency (first)", self._lat_first_sketch, ".1f", " ms"),
+            ("Confidence", self._conf_sketch, ".2f", ""),
+        ):
+            if not sketch.n:
+                continue
+            p = sketch.quantiles((50, 90, 99))
+            lines += (
+                f"\n{label} p50/p90/p99: {p[50]:{fmt}} / {p[90]:{fmt}} / {p[99]:{fmt}}{unit}   "
+                f"{sketch.min:{fmt}} [{sketch.sparkline()}] {sketch.max:{fmt}}{unit}"
+            )
+        return lines
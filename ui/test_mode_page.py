@@ -1,7 +1,6 @@
 from __future__ import annotations
 import time
 import math
-from pathlib import Path
 
 from PySide6.QtWidgets import (
     QWidget,
@@ -13,7 +12,9 @@ from PySide6.QtWidgets import (
     QSlider,
 )
 from PySide6.QtCore import Qt, QTimer
-from PySide6.QtSvgWidgets import QSvgWidget
+
+from app.modes.gesture_decoder import SlidingVoteDecoder
+from app.ui.icon_cache import shared_icons
 
 
 class TestModePage(QWidget):
@@ -50,18 +51,17 @@ class TestModePage(QWidget):
         discrete_layout.addWidget(self.current_label)
         discrete_layout.addWidget(hint)
         
-        # SVG Gesture Icon Setup
-        self._gesture_icon_dir = (
-            Path(__file__).resolve().parent.parent / "assets" / "gestures"
-        )
+        # Gesture icons, parsed once and pre-rendered at this page's size
+        self._icon_size = 160
+        self._icons = shared_icons()
+        self._icons.warm("gestures", self._icon_size)
 
-        self.gesture_icon = QSvgWidget()
-        self.gesture_icon.setFixedSize(160, 160)
+        self.gesture_icon = QLabel()
+        self.gesture_icon.setFixedSize(self._icon_size, self._icon_size)
+        self.gesture_icon.setScaledContents(True)
 
-        # Load the initial REST icon
-        rest_icon = self._gesture_icon_dir / "rest.svg"
-        if rest_icon.exists():
-            self.gesture_icon.load(str(rest_icon))
+        # Show the initial REST icon
+        self._update_gesture_icon("REST")
 
         # You know we centering that icon
         discrete_layout.addWidget(self.gesture_icon, alignment=Qt.AlignCenter)
@@ -126,11 +126,13 @@ class TestModePage(QWidget):
         self._last_change_time: float | None = None
         self._timeout_s = 2.0 # 3 Seconds before returning to REST
 
+        # Same sliding-window decoder a live classifier stream would use; keys are its samples
+        self._decoder = SlidingVoteDecoder(window_ms=self._timeout_s * 1000.0, tau_ms=250.0)
+
         # Timer for REST timeout
         self._timer = QTimer(self)
         self._timer.setInterval(200)
         self._timer.timeout.connect(self._check_timeout)
-        self._timer.start()
 
         #----------------------------------------------------------
         # Continuous State handler 
@@ -150,12 +152,53 @@ class TestModePage(QWidget):
         self._cont_timer = QTimer(self)
         self._cont_timer.setInterval(20)
         self._cont_timer.timeout.connect(self._cont_tick)
-        self._cont_timer.start()
+
+        # Timers run only while the page is on screen (see activate/deactivate)
+        self._active = False
 
         # Capture keys at page level
         self.setFocusPolicy(Qt.StrongFocus)
         self.setFocus()
 
+    #---------------------------------------------------------
+    # Page Lifecycle
+    #---------------------------------------------------------
+    def activate(self):
+        """
+        Page shown: resume the timer for the selected view
+        """
+        self._active = True
+        self.setFocus()
+        self._sync_timers()
+
+    def deactivate(self):
+        """
+        Page hidden: stop both timers and drop held keys
+        """
+        self._active = False
+        self._cont_up_pressed = False
+        self._cont_down_pressed = False
+        self._sync_timers()
+
+    def _sync_timers(self):
+        """
+        Only the visible view's timer runs, and only while the page is active
+        """
+        discrete = self._active and self.mode_selector.currentText() == "Discrete"
+        continuous = self._active and self.mode_selector.currentText() == "Continuous"
+        if discrete:
+            # Expire anything that aged out while hidden right away
+            self._check_timeout()
+            self._timer.start()
+        else:
+            self._timer.stop()
+        if continuous:
+            # No dt jump for the time spent hidden
+            self._cont_last_tick = time.perf_counter()
+            self._cont_timer.start()
+        else:
+            self._cont_timer.stop()
+
     #---------------------------------------------------------
     # Mode Switching Logic
     #---------------------------------------------------------
@@ -171,6 +214,7 @@ class TestModePage(QWidget):
             self.discrete_container.setVisible(False)
             self.continuous_container.setVisible(True)
             self.setFocus()
+        self._sync_timers()
 
     #---------------------------------------------------------
     # Key Handling 
@@ -182,11 +226,11 @@ class TestModePage(QWidget):
 
         # Discrete Control
         if ch == "r":
-            self._set_gesture("ROCK")
+            self._push_gesture("ROCK")
         elif ch == "p":
-            self._set_gesture("PAPER")
+            self._push_gesture("PAPER")
         elif ch == "s":
-            self._set_gesture("SCISSORS") 
+            self._push_gesture("SCISSORS") 
 
         # Continuous Control
         if key == Qt.Key_Up:
@@ -206,6 +250,14 @@ class TestModePage(QWidget):
     # Helpers
     #----------------------------------------------------------
 
+    def _push_gesture(self, token: str):
+        """
+        Feed one sample to the decoder; the view changes only when the smoothed vote does
+        """
+        decision = self._decoder.push(token, time.perf_counter())
+        if decision is not None:
+            self._set_gesture(decision["prediction"])
+
     def _set_gesture(self, gesture: str):
         """
         Update the current gesture and reset the timer
@@ -217,40 +269,22 @@ class TestModePage(QWidget):
 
     def _update_gesture_icon(self, gesture: str):
         """
-        Loads the correct svg file
+        Shows the cached icon for 'gesture'
         """
-        if not hasattr(self, "_gesture_icon_dir"):
-            return
-        
-        filename = gesture.lower() + ".svg"
-        svg_path = self._gesture_icon_dir / filename
-
         # If the icon doesn't exist fall back to rest
-        if not svg_path.exists():
-            svg_path = self._gesture_icon_dir / "rest.svg"
-            if not svg_path.exists():
-                return
+        pm = self._icons.pixmap("gestures", gesture, self._icon_size, fallback="rest")
+        if pm is None:
+            return
             
-        self.gesture_icon.load(str(svg_path))
-        self.gesture_icon.update()
+        self.gesture_icon.setPixmap(pm)
 
     def _check_timeout(self):
         """
-        If no inputs are received for 5 seconds, return REST
+        Expire samples older than the decoder window; an empty window decodes to REST
         """
-
-        if self._current_gesture == "REST":
-            return
-        if self._last_change_time is None:
-            return
-        
-        now = time.perf_counter()
-        if (now - self._last_change_time) >= self._timeout_s:
-            # go back to REST
-            self._current_gesture = "REST"
-            self._last_change_time = None
-            self.current_label.setText("Current Gesture: REST")
-            self._update_gesture_icon("REST")
+        decision = self._decoder.poll(time.perf_counter())
+        if decision is not None:
+            self._set_gesture(decision["prediction"])
 
     def _cont_tick(self):
         """
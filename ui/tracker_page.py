@@ -1,16 +1,105 @@
 from __future__ import annotations
 
 import time
+from dataclasses import asdict
+
+import numpy as np
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QHBoxLayout
-from PySide6.QtCore import Qt, QTimer
+from PySide6.QtCore import QObject, QThread, Qt, QTimer, Signal
 
+from app.modes.key_physics import KeyPhysics, KeyPhysicsParams
+from app.modes.tick_scheduler import DeadlineScheduler
 from app.modes.tracker_mode import TrackerMode, TrackerConfig
+from app.processing.latency import LatencyMonitor
+from app.processing.recorder import MODE_TRACKER, SessionRecorder
+from app.processing.results_store import ResultsStore, fmt_metric
+from app.ui.paint_probe import PaintProbe
 from pyqtgraph import PlotWidget
 
+class TrackerWorker(QObject):
+    """
+    Runs keyboard physics and TrackerMode.step on its own thread at a fixed rate.
+
+    Each scheduled deadline becomes one sample at exactly that instant, whatever
+    the GUI is doing. The GUI never touches the worker's state directly: it reads
+    'latest' and 'live' (replaced whole, never mutated) and the mode's buffers,
+    which are append-only and publish a sample only after it is fully written.
+    """
+    finished = Signal()
+
+    def __init__(self, mode: TrackerMode, hz: float, force_fn, recorder: SessionRecorder | None = None,
+                 trial: int = 0, physics: KeyPhysicsParams | None = None):
+        super().__init__()
+        self.mode = mode
+        self.force_fn = force_fn        # -> +1 up, -1 down, 0 neither/both
+        self.recorder = recorder
+        self.trial = trial
+        # Catch up to 100 ms of deadlines after a stall (e.g. GIL held by a slow frame)
+        self.scheduler = DeadlineScheduler(hz, max_catchup=max(int(hz * 0.1), 1))
+        self._stop = False
+        self.done = False
+
+        # (state, t_deadline, t_stepped) of the newest sample, None before the first
+        self.latest = None
+        # Live metrics, refreshed ~20 times a second
+        self.live = mode.live_metrics()
+        self._live_every = max(int(hz / 20.0), 1)
+
+        # Key force -> user value ('analog' keyboard physics)
+        self.physics = KeyPhysics(physics)
+
+    def stop(self):
+        self._stop = True
+
+    def run(self):
+        mode = self.mode
+        # Sample k lands at exactly t0 + k / hz on the trial's own clock
+        self.scheduler.start(mode._t0)
+        last = mode._t0
+        n = 0
+        state = None
+        while not self._stop and mode.is_running:
+            # Can be empty: a wake-up just short of the deadline has no sample due yet
+            ticks = self.scheduler.wait()
+            for deadline in ticks:
+                force = self.force_fn()
+                user = self.physics.step(force, max(0.0, deadline - last))
+                last = deadline
+                state = mode.step(t_now=deadline, user_val=user)
+                if self.recorder is not None:
+                    self.recorder.tracker_sample(self.trial, state['t'], state['target'], state['user'], force)
+                n += 1
+                if n % self._live_every == 0:
+                    self.live = mode.live_metrics()
+                if not mode.is_running:
+                    break
+            if ticks:
+                self.latest = (state, deadline, time.perf_counter())
+        self.live = mode.live_metrics()
+        self.done = True
+        self.finished.emit()
+
+
 class TrackerPage(QWidget):
-    def __init__(self, on_back_clicked, parent=None):
+    # (trial index, summary line), emitted from the results writer thread
+    _results_ready = Signal(int, str)
+
+    def __init__(self, on_back_clicked, parent=None, recorder: SessionRecorder | None = None,
+                 latency: LatencyMonitor | None = None, results: ResultsStore | None = None):
         super().__init__(parent)
 
+        # Session log for tracker samples (optional)
+        self.recorder = recorder
+        self._trial_index = -1
+
+        # Per-trial metrics database (optional); also answers the session/all-time summary
+        self.results = results
+        self._results_ready.connect(self._show_results_summary)
+
+        # sample -> published -> rendered -> painted latency histograms
+        self.latency = latency or LatencyMonitor()
+        self._trace = 0
+
         # Title
         title = QLabel("Continuous Tracker Mode")
         title.setAlignment(Qt.AlignCenter)
@@ -38,6 +127,10 @@ class TrackerPage(QWidget):
         # Target and User curves and markers
         self._target_curve = self.plot.plot(pen={'color': (58, 168, 50), 'width': 4}, name='Target')
         self._user_curve   = self.plot.plot(pen={'color': (144, 50, 191), 'width': 2}, name='User')
+        for curve in (self._target_curve, self._user_curve):
+            # Only draw what is in view, at most ~1 point per pixel
+            curve.setClipToView(True)
+            curve.setDownsampling(auto=True, method='peak')
 
         self._target_dot = self.plot.plot(
             [], [], pen=None, symbol='o', symbolSize=18, symbolBrush=(58, 168, 50)
@@ -46,6 +139,9 @@ class TrackerPage(QWidget):
             [], [], pen=None, symbol='o', symbolSize=12, symbolBrush=(144, 50, 191)
         )
 
+        # Stamps the plot's next repaint after a frame is handed over
+        self._paint_probe = PaintProbe(self.plot.viewport())
+
         # Buttons
         self.start_btn = QPushButton("Start Trial")
         self.start_btn.setFixedHeight(40)
@@ -80,12 +176,21 @@ class TrackerPage(QWidget):
         self._countdown_remaining = 0 
         self._is_counting_down = False
 
-        # Trial tick timer
-        self._tick_hz = 50.0 # 50 Hz by default
-        self._tick_ms = int(1000.0 / self._tick_hz) # 20 ms
-        self._tick_timer = QTimer(self)
-        self._tick_timer.setInterval(self._tick_ms)
-        self._tick_timer.timeout.connect(self._tick)
+        # Longest time span kept on screen; older samples stay in TrackerMode only
+        self._max_window_s = 15.0
+        self._window_s = self._max_window_s
+
+        # Simulation rate: input physics + TrackerMode.step run on a TrackerWorker thread
+        self._tick_hz = 200.0
+        self._thread: QThread | None = None
+        self._worker: TrackerWorker | None = None
+
+        # Render timer at display rate; a slow frame never delays sampling
+        self._frame_hz = 60.0
+        self._frame_timer = QTimer(self)
+        self._frame_timer.setInterval(int(1000.0 / self._frame_hz))
+        self._frame_timer.timeout.connect(self._render)
+        self._last_rendered = None
 
         # Mode engine 
         cfg = TrackerConfig(
@@ -96,6 +201,7 @@ class TrackerPage(QWidget):
             target_amplitude=0.7,   
             stabilize_user=False,
             stabilize_alpha=0.15,
+            max_lag_s=1.0,          # bounded lag -> end-of-trial metrics come from the live accumulators
         )
         self.mode = TrackerMode(cfg)
 
@@ -105,54 +211,35 @@ class TrackerPage(QWidget):
         self._down_pressed = False
         self.grabbed_keyboard = False
 
-        # Physics params (needs tuning)
-        # params for step wave:
-        '''
-        self._user_value = 0.0        # Current slider value in [-1, 1]
-        self._velocity = 0.0          # Internal velocity
-        self._accel = 5.0             # units per second^2 when holding a key
-        self._damping = 5.0           # velocity damping
-        self._vmax = 3.0              # clamp velocity max
-        self._last_tick_time = None   # perf_counter of last tick for dt
-        '''
-
+        # Physics params (tune with processing/physics_sweep.py on recorded sessions)
+        # params for step wave: KeyPhysicsParams(accel=5.0, damping=5.0, vmax=3.0)
         # params for sine wave:
-        
-        self._user_value = 0.0        # Current slider value in [-1, 1]
-        self._velocity = 0.0          # Internal velocity
-        self._accel = 5.0             # units per second^2 when holding a key
-        self._damping = 3.0           # velocity damping
-        self._vmax = 3.0              # clamp velocity max
-        self._last_tick_time = None   # perf_counter of last tick for dt
-        
+        self.physics = KeyPhysicsParams(accel=5.0, damping=3.0, vmax=3.0)
+
         #------------------------------
         # Countdown Flow
         #------------------------------
 
     def _start_countdown(self):
         """ Begin a simple countdown (3..2..1..GO!)"""
-        if self._is_counting_down or self._tick_timer.isActive():
+        if self._is_counting_down or self._thread is not None:
             return
         self._is_counting_down = True
         self.start_btn.setEnabled(False)
 
-        # Reset engine and local state
-        self._user_value = 0.0
-        self._velocity = 0.0
+        # Reset local state
         self._up_pressed = False
         self._down_pressed = False
-        self._last_tick_time = None
+        self._last_rendered = None
         
 
         #Prep plot for new trial
-        self._window_s = self.mode.cfg.duration_s
+        self._window_s = min(self.mode.cfg.duration_s, self._max_window_s)
         self._target_curve.setData([], [])
         self._user_curve.setData([], [])
         self._target_dot.setData([], [])
         self._user_dot.setData([], [])
         self.plot.setXRange(0, self._window_s, padding=0.0)
-        self._plot_every_n = 2
-        self._plot_counter = 0
 
         # Countdown
         self.status.setText("Get Ready...")
@@ -179,66 +266,57 @@ class TrackerPage(QWidget):
 
         # Start trial clock
         self.mode.start()
+        self._trial_index += 1
+        if self.recorder is not None:
+            self.recorder.trial_start(MODE_TRACKER, self._trial_index, time.perf_counter())
 
         # Lock plot x-axis to right edge = now 
         self.plot.setXRange(0 - self._window_s, 0, padding=0.0)
 
-        # Start ticker
-        self._last_tick_time = time.perf_counter()
-        self._tick_timer.start()
+        # Launch the simulation worker, then render whatever it has published at display rate
+        self._thread = QThread()
+        self._worker = TrackerWorker(self.mode, self._tick_hz, self._key_force, self.recorder, self._trial_index,
+                                     self.physics)
+        self._worker.moveToThread(self._thread)
+        self._thread.started.connect(self._worker.run)
+        self._worker.finished.connect(self._end_trial)
+        self._worker.finished.connect(self._thread.quit)
+        self._thread.start()
+        self._frame_timer.start()
 
     def _update_countdown_label(self):
         self.status.setText(f"{self._countdown_remaining}...")
 
-    def _tick(self):
+    def _key_force(self) -> float:
         """
-        Advance the trial by one tick: update user via keyboard inputs, feed TrackerMode, update readout.
+        Current key force for the worker's physics (plain bool reads, no locking needed)
         """
-        now = time.perf_counter()
-        if self._last_tick_time is None:
-            dt = 1.0 / self._tick_hz
-        else:
-            dt = max(0.0, now - self._last_tick_time)
-        self._last_tick_time = now
-
-        #---'Analog' Keyboard Physics---
-        # input force: +1 for up, -1 for down, 0 for neither/both
-        force = (1.0 if self._up_pressed else 0.0) - (1.0 if self._down_pressed else 0.0)
-
-        # Accelerate velocity with damping
-        self._velocity += self._accel * force * dt
-        # clamp velocity to prevent runaway
-        if self._velocity > self._vmax:
-            self._velocity = self._vmax
-        elif self._velocity < -self._vmax:
-            self._velocity = -self._vmax
-        
-        # Damp it
-        self._velocity -= self._damping * self._velocity * dt
-
-        # Integrate into user value and clamp to [-1, 1]
-        self._user_value += self._velocity * dt
-        if self._user_value > 1.0:
-            self._user_value = 1.0
-            self._velocity = 0.0
-        elif self._user_value < -1.0:
-            self._user_value = -1.0
-            self._velocity = 0.0
-
-        # Step
-        state = self.mode.step(t_now=now, user_val=self._user_value)
-
-        # Update readout
+        return (1.0 if self._up_pressed else 0.0) - (1.0 if self._down_pressed else 0.0)
+
+    def _render(self):
+        """
+        Draw the newest sample the worker has published. Runs at display rate; frames that
+        run long are simply fewer frames, the sample grid is unaffected.
+        """
+        worker = self._worker
+        latest = worker.latest if worker is not None else None
+        if latest is None or latest is self._last_rendered:
+            return
+        self._last_rendered = latest
+        state, t_sample, t_published = latest
+
+        trace = self._trace = self._trace + 1
+        self.latency.begin("tracker", trace, "sample", t_sample)
+        self.latency.mark("tracker", trace, "published", t_published)
+
+        # Update readout (live metrics are O(1) in the trial length)
+        live = worker.live
         self.readout.setText(
-            f"t = {state['t']:.2f} s  target = {state['target']:+.3f}  user = {state['user']:+.3f}"
+            f"t = {state['t']:.2f} s  target = {state['target']:+.3f}  user = {state['user']:+.3f}   "
+            f"RMSE = {live['rmse']:.3f}  r = {live['r']:+.3f}  lag = {live['lag_ms']:.0f} ms"
         )
 
-        # Throttle plot updates
-        self._plot_counter += 1
-        if self._plot_counter % self._plot_every_n == 0:
-            #Use engine buffers
-            self._target_curve.setData(self.mode.times, self.mode.target_vals)
-            self._user_curve.setData(self.mode.times, self.mode.user_vals)
+        self._update_curves(state['t'])
 
         # Move target and user markers
         t_now_s = state['t']
@@ -249,30 +327,120 @@ class TrackerPage(QWidget):
         left = max(0.0, t_now_s - self._window_s)
         right = t_now_s
         self.plot.setXRange(left, right, padding=0.05)
+        self.latency.mark("tracker", trace, "rendered")
+        self._paint_probe.arm(lambda t: self.latency.end("tracker", trace, "painted", t))
+
+    def _update_curves(self, t_now_s: float):
+        """
+        Hand the curves only the samples inside the sliding window, so the cost per frame
+        does not grow with the trial length.
+        """
+        # Zero-copy views of every sample published so far (the worker may be appending)
+        times, target, user = self.mode.snapshot()
+        # Buffers are time-ordered; keep one sample left of the window so lines reach the edge
+        i0 = max(int(np.searchsorted(times, t_now_s - self._window_s, side='left')) - 1, 0)
+        self._target_curve.setData(times[i0:], target[i0:])
+        self._user_curve.setData(times[i0:], user[i0:])
 
-        # Stop
-        if self.mode.finished():
-            self._end_trial()
-    
     def _end_trial(self):
         """
-        Stop timers, release keyboard, compute metrics, show status.
+        Stop worker and render timer, release keyboard, compute metrics, show status.
         """
-        self._tick_timer.stop()
-        if self.grabbed_keyboard:
-            self.releaseKeyboard()
-            self.grabbed_keyboard = False
+        if self._worker is None or not self._worker.done:
+            # Late signal from a trial that was already aborted
+            return
+        worker = self._stop_worker()
 
         # Final plot refresh
-        self._target_curve.setData(self.mode.times, self.mode.target_vals)
-        self._user_curve.setData(self.mode.times, self.mode.user_vals)
+        if self.mode.n_samples:
+            self._update_curves(float(self.mode.times[-1]))
 
         self.mode.stop()
         metrics = self.mode.compute_metrics()
+        ticks = worker.scheduler.stats()
         self.status.setText(
             f"Trial Complete!  RMSE: {metrics['rmse']:.3f}   r: {metrics['r']:.3f}   "
-            f"Lag: {metrics['lag_ms']:.0f} ms   RMSE at Best Lag: {metrics['rmse_best_lag']:.3f}"
+            f"Lag: {metrics['lag_ms']:.0f} ms   RMSE at Best Lag: {metrics['rmse_best_lag']:.3f}\n"
+            f"Ticks: {ticks['ticks']}  late: {ticks['late']}  missed: {ticks['missed']}  "
+            f"(lateness p50 {ticks['lateness_p50_ms']:.2f} ms, p99 {ticks['lateness_p99_ms']:.2f} ms)"
         )
+        self._record_results(metrics)
+        self.start_btn.setEnabled(True)
+
+    def _record_results(self, metrics: dict):
+        """
+        Store the trial's metrics; the session and all-session averages are
+        computed on the results writer thread and appended to the status when ready
+        """
+        if self.results is None:
+            return
+        store = self.results
+        config = {**asdict(self.mode.cfg), "physics": asdict(self.physics)}
+        store.record_tracker(self._trial_index, metrics, config)
+        trial = self._trial_index
+
+        def summarize():
+            if store.error is not None:
+                self._results_ready.emit(trial, f"Results database error: {store.error}")
+                return
+            try:
+                session = store.summary("tracker", session=store.session)
+                overall = store.summary("tracker", subject=store.subject)
+            except Exception as e:
+                self._results_ready.emit(trial, f"Results database error: {e}")
+                raise
+            self._results_ready.emit(trial, (
+                f"This session: {session['trials']} trials, mean RMSE {fmt_metric(session['rmse'])}, "
+                f"r {fmt_metric(session['r'])}   "
+                f"All sessions: {overall['trials']} trials, mean RMSE {fmt_metric(overall['rmse'])}, "
+                f"r {fmt_metric(overall['r'])}"
+            ))
+
+        store.after_write(summarize)
+
+    def _show_results_summary(self, trial: int, line: str):
+        # Only onto the status of the trial it belongs to, if that is still shown
+        if trial != self._trial_index or not self.status.text().startswith("Trial Complete!"):
+            return
+        self.status.setText(self.status.text() + "\n" + line)
+
+    def _stop_worker(self) -> TrackerWorker | None:
+        """
+        Stop rendering and the simulation thread, release the keyboard; returns the stopped worker
+        """
+        self._frame_timer.stop()
+        if self.grabbed_keyboard:
+            self.releaseKeyboard()
+            self.grabbed_keyboard = False
+        worker = self._worker
+        if worker is None:
+            return None
+        worker.stop()
+        self._thread.quit()
+        self._thread.wait()
+        # Both are unparented and the thread has finished: dropping them frees them
+        self._thread = None
+        self._worker = None
+        return worker
+
+    #---Page Lifecycle---
+    def activate(self):
+        self.setFocus()
+
+    def deactivate(self):
+        """
+        Leaving the page abandons a countdown or running trial; the page comes back idle
+        """
+        if self._is_counting_down:
+            self._countdown_timer.stop()
+            self._is_counting_down = False
+        elif self._worker is None:
+            return
+        self._stop_worker()
+        self.mode.stop()
+        self._up_pressed = False
+        self._down_pressed = False
+        self.status.setText("Trial aborted")
         self.start_btn.setEnabled(True)
 
     #---Key Handling---